@@ -3,6 +3,8 @@
 from agentpy import AgentList
 
 from .agent import Agent
+from .agent import ColumnarAgent
+from .attributes import AttributeStore
 from .creator import Creator
 from .exceptions import Pop2netException
 from .inspector import NetworkInspector
@@ -11,10 +13,14 @@ from .location import MagicLocation
 from .location import MeltLocation
 from .model import Model
 from .sequences import LocationList
+from .storage import ArrayStorage
+from .storage import NetworkxStorage
 
 __all__ = [
     "AgentList",
     "Agent",
+    "ColumnarAgent",
+    "AttributeStore",
     "Pop2netException",
     "Location",
     "MagicLocation",
@@ -23,4 +29,6 @@ __all__ = [
     "Model",
     "LocationList",
     "Creator",
+    "ArrayStorage",
+    "NetworkxStorage",
 ]
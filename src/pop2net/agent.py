@@ -71,11 +71,27 @@ class Agent(ap.Agent):
         Args:
             location: Add agent to this location.
         """
-        self.model.add_agent_to_location(self, location)
+        self.model.add_agent_to_location(location=location, agent=self)
 
     def add_locations(self, locations: list) -> None:
-        for location in locations:
-            self.add_location(location)
+        """Add this Agent to multiple locations at once.
+
+        The memberships are added in one pass, unless a subclass overwrites :meth:`add_location`,
+        which is then called for each location.
+
+        Args:
+            locations: An iterable over locations.
+        """
+        if type(self).add_location is not Agent.add_location:
+            for location in locations:
+                self.add_location(location)
+            return
+
+        location_ids = [location.id for location in locations]
+        self.model.add_memberships(
+            location_ids=location_ids,
+            agent_ids=[self.id] * len(location_ids),
+        )
 
     def remove_location(self, location: _location.Location) -> None:
         """Remove this Agent from a given location.
@@ -83,11 +99,27 @@ class Agent(ap.Agent):
         Args:
             location: Remove agent from this location.
         """
-        self.model.remove_agent_from_location(self, location)
+        self.model.remove_agent_from_location(location=location, agent=self)
 
     def remove_locations(self, locations: list) -> None:
-        for location in locations:
-            self.remove_location(location)
+        """Remove this Agent from multiple locations at once.
+
+        The memberships are removed in one pass, unless a subclass overwrites
+        :meth:`remove_location`, which is then called for each location.
+
+        Args:
+            locations: An iterable over locations.
+        """
+        if type(self).remove_location is not Agent.remove_location:
+            for location in locations:
+                self.remove_location(location)
+            return
+
+        location_ids = [location.id for location in locations]
+        self.model.remove_memberships(
+            location_ids=location_ids,
+            agent_ids=[self.id] * len(location_ids),
+        )
 
     @property
     def locations(self) -> _sequences.LocationList:
@@ -98,6 +130,19 @@ class Agent(ap.Agent):
         """
         return self.model.locations_of_agent(self)
 
+    def locations_of_type(self, location_classes: type | str | list) -> _sequences.LocationList:
+        """Return the locations of the given classes that this agent is associated with.
+
+        Args:
+            location_classes: A location class, the name of a location class or a list of both.
+
+        Returns:
+            A list of locations.
+        """
+        if not isinstance(location_classes, list):
+            location_classes = [location_classes]
+        return self.model.locations_of_agent(self, location_classes=location_classes)
+
     def get_agent_weight(self, agent: Agent, location_classes: list | None = None) -> float:
         """Return the contact weight between this agent and a given other agent.
 
@@ -188,3 +233,43 @@ class Agent(ap.Agent):
                 if warn:
                     msg = "You have removed a location to which other agents were still connected."
                     warnings.warn(msg)
+
+
+class ColumnarAgent(Agent):
+    """An agent whose attributes from the Creator are kept in columns owned by the model.
+
+    When the :class:`pop2net.Creator` creates agents of this class from a DataFrame, it does not
+    copy the DataFrame's values into each agent. Instead, the columns are stored once in the
+    model's :class:`pop2net.AttributeStore` (:attr:`pop2net.Model.agent_attributes`), and the
+    agent reads and writes these attributes through the store. Use it to compute on attributes of
+    all agents at once, e.g. in the batch methods of a :class:`pop2net.MagicLocation`. It also
+    saves some memory, but only about 18% per agent with 9 attributes (760 instead of 930 bytes)::
+
+        class Person(p2n.ColumnarAgent):
+            pass
+
+        agents = creator.create_agents(df=df, agent_class=Person)
+        ages = model.agent_attributes.column("age", agents)
+
+    All other attributes are kept by the agent itself, as with :class:`Agent`.
+    """
+
+    _row: int | None = None
+
+    def __getattr__(self, name: str):
+        """Read an attribute from the model's attribute store.
+
+        This is only called if the attribute is not found on the agent itself.
+        """
+        if self._row is not None:
+            store = self.model.agent_attributes
+            if name in store.columns:
+                return store.get(self._row, name)
+        return super().__getattr__(name)
+
+    def __setattr__(self, name: str, value) -> None:
+        """Write an attribute to the model's attribute store if it has a column for it."""
+        if self._row is not None and name in self.model.agent_attributes.columns:
+            self.model.agent_attributes.set(self._row, name, value)
+        else:
+            super().__setattr__(name, value)
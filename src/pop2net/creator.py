@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+import bisect
+import itertools
 import math
+import operator
 import random
 import warnings
 
+import numpy as np
 import pandas as pd
 
 import pop2net as p2n
@@ -13,6 +17,9 @@ import pop2net.utils as utils
 
 from .exceptions import Pop2netException
 
+# the attributes by which every agent refers to its model
+_MODEL_REFERENCES = ("model", "p", "log")
+
 
 class Creator:
     """Creates and connects agents and locations."""
@@ -31,8 +38,15 @@ class Creator:
         self.model = model
         self.seed = seed
         self.rng = random.Random(seed)
+        # holds the dummy locations whose methods are evaluated while locations are created;
+        # it has no agents and is replaced for each location class to free its locations
         self._dummy_model = p2n.Model()
-        self._temp_agent_attrs = ["_P2NTEMP_split_values", "_P2NTEMP_melt_location_weight"]
+        # temporary state of the agents while locations are created, by agent id
+        self._method_values: dict[tuple[str, str], dict] = {}
+        self._melt_location_weights: dict[int, float | None] = {}
+        self._bridge_values: dict[str, dict] = {}
+        # the mother locations of each agent by mother location class
+        self._mother_locations: dict[type, dict[int, list]] = {}
 
     def _create_dummy_location(self, location_cls) -> p2n.Location:
         location = location_cls(model=self._dummy_model)
@@ -80,33 +94,42 @@ class Creator:
             )
 
         else:
-            sample_level_ids = list(df[sample_level].drop_duplicates())
-
-            if sample_weight is not None:
-                weights = list(df.drop_duplicates(subset=sample_level)[sample_weight])
-
-            samples = []
-            counter = 0
-            sample_cluster_id = 1
-            while counter < n:
-                if sample_weight is None:
-                    random_id = self.rng.choice(sample_level_ids)
-                else:
-                    random_id = self.rng.choices(sample_level_ids, weights=weights, k=1)[0]
-
-                sample = df.loc[df[sample_level] == random_id, :].copy()
-
-                # create new unique ids for sample level variable
-                if replace_sample_level_column:
-                    sample.loc[:, sample_level + "_original"] = sample.loc[:, sample_level]
-                    sample.loc[:, sample_level] = sample_cluster_id
+            # the rows of each sample unit, indexed once
+            order, starts, lengths = utils._group_offsets(df[sample_level])
 
-                samples.append(sample)
-
-                counter += len(sample)
-                sample_cluster_id += 1
-
-            df_sample = pd.concat(samples).reset_index(drop=True)
+            if sample_weight is None:
+                probabilities = None
+                mean_length = lengths.mean()
+            else:
+                # the weight of a sample unit is the weight of its first row
+                weights = df[sample_weight].to_numpy(dtype=float)[order[starts]]
+                probabilities = weights / weights.sum()
+                mean_length = probabilities @ lengths
+
+            rng = np.random.default_rng(self.rng.getrandbits(64))
+            sample_units = np.empty(0, dtype=np.int64)
+            n_rows = 0
+            while n_rows < n:
+                # draw enough sample units for the missing rows at once
+                n_draws = math.ceil((n - n_rows) / mean_length * 1.1) + 1
+                new_sample_units = rng.choice(len(lengths), size=n_draws, p=probabilities)
+                sample_units = np.concatenate([sample_units, new_sample_units])
+                n_rows += lengths[new_sample_units].sum()
+
+            # keep the sample units up to the first one with which the sample reaches n rows
+            n_sample_units = np.searchsorted(np.cumsum(lengths[sample_units]), n) + 1
+            sample_units = sample_units[:n_sample_units]
+
+            df_sample = df.iloc[utils._gather_groups(order, starts, lengths, sample_units)]
+            df_sample = df_sample.reset_index(drop=True)
+
+            # create new unique ids for sample level variable
+            if replace_sample_level_column:
+                df_sample[sample_level + "_original"] = df_sample[sample_level]
+                df_sample[sample_level] = np.repeat(
+                    np.arange(1, len(sample_units) + 1),
+                    lengths[sample_units],
+                )
 
         return df_sample
 
@@ -138,24 +161,40 @@ class Creator:
             A list of agents.
         """
         if df is not None:
-            df = df.copy()
+            if "id" in df.columns:
+                msg = "You are not allowed to set an agent attribute called `id`."
+                raise Exception(msg)
+
+            if agent_class_dict is None:
+                agent_classes = [agent_class] * len(df)
+            else:
+                agent_classes = [agent_class_dict[value] for value in df[agent_class_attr]]
+
+            # convert all columns at once instead of building a Series for each row
+            col_names = list(df.columns)
+            rows = zip(*df.to_dict("list").values()) if col_names else itertools.repeat((), len(df))
 
             # create one agent for each row in df
             agents = []
-            for _, row in df.iterrows():
-                if agent_class_dict is None:
-                    agent = agent_class(model=self.model)
+            columnar_positions = []
+            for position, (cls, row) in enumerate(zip(agent_classes, rows)):
+                agent = cls(model=self.model)
+                if isinstance(agent, p2n.ColumnarAgent):
+                    # the attributes are added to the model's columns below
+                    columnar_positions.append(position)
                 else:
-                    agent = agent_class_dict[row[agent_class_attr]](model=self.model)
-
-                for col_name in df.columns:
-                    if col_name == "id":
-                        msg = "You are not allowed to set an agent attribute called `id`."
-                        raise Exception(msg)
-                    else:
-                        setattr(agent, col_name, row[col_name])
+                    for col_name, value in zip(col_names, row):
+                        setattr(agent, col_name, value)
                 agents.append(agent)
 
+            if columnar_positions:
+                rows = self.model.agent_attributes.add_rows(
+                    {col_name: df[col_name].to_numpy()[columnar_positions] for col_name in df},
+                    n=len(columnar_positions),
+                )
+                for position, row in zip(columnar_positions, rows):
+                    agents[position]._row = row
+
         else:
             if n is not None:
                 agents = [agent_class(model=self.model) for _ in range(n)]
@@ -167,31 +206,106 @@ class Creator:
 
         return agents
 
-    def _get_affiliated_agents(self, agents, dummy_location) -> list:
-        temp_filter_attr = "_P2NTEMP_filter_" + dummy_location.type
+    def _uses_batch_method(self, dummy_location, method: str) -> bool:
+        batch_method = getattr(type(dummy_location), method + "_batch", None)
+        return batch_method is not None and batch_method is not getattr(
+            p2n.MagicLocation,
+            method + "_batch",
+        )
 
-        affiliated_agents = []
-        for agent in agents:
-            if not hasattr(agent, temp_filter_attr):
-                setattr(agent, temp_filter_attr, dummy_location.filter(agent))
-                self._temp_agent_attrs.append(temp_filter_attr)
+    def _get_agents_df(self, agents: list) -> pd.DataFrame:
+        """Return a DataFrame of the attributes of the given agents, indexed by their ids.
 
-            if getattr(agent, temp_filter_attr):
-                affiliated_agents.append(agent)
+        The DataFrame is built column by column: the attributes that the agents keep themselves
+        are collected into one array per attribute, and the attributes of ColumnarAgents are
+        sliced from the columns of the model's attribute store. Private attributes and the
+        references to the model that every agent has are left out.
+        """
+        agent_vars = [vars(agent) for agent in agents]
+        names = list(agent_vars[0]) if agent_vars else []
+        names += sorted(set().union(*agent_vars).difference(names))
+
+        columns = {}
+        for name in names:
+            if name.startswith("_") or name in _MODEL_REFERENCES:
+                continue
+            try:
+                values = list(map(operator.itemgetter(name), agent_vars))
+            except KeyError:
+                values = [attrs.get(name, np.nan) for attrs in agent_vars]
+            columns[name] = _column(values)
+
+        rows = np.array(
+            [-1 if (row := attrs.get("_row")) is None else row for attrs in agent_vars],
+            dtype=np.int64,
+        )
+        is_columnar = rows >= 0
+        if is_columnar.all():
+            for name, column in self.model.agent_attributes.columns.items():
+                columns[name] = column[rows]
+        elif is_columnar.any():
+            for name, column in self.model.agent_attributes.columns.items():
+                values = np.full(len(agents), np.nan, dtype=object)
+                values[is_columnar] = column[rows[is_columnar]]
+                columns[name] = _column(values.tolist())
+
+        return pd.DataFrame(columns, index=columns["id"])
+
+    def _get_method_values(self, dummy_location, method: str, agents: list) -> list:
+        """Return the values of a location method like `filter` for each agent.
+
+        Each method is evaluated only once per agent and location class while locations are
+        created. If the location class overwrites the batch counterpart of the method, e.g.
+        `filter_batch`, it is called once with a DataFrame of all agents whose values are missing.
+        """
+        values = self._method_values.setdefault((dummy_location.type, method), {})
+        missing_agents = [agent for agent in agents if agent.id not in values]
+
+        if missing_agents and self._uses_batch_method(dummy_location, method):
+            df = self._get_agents_df(missing_agents)
+            batch_values = getattr(dummy_location, method + "_batch")(df)
+            batch_values = (
+                batch_values.tolist() if hasattr(batch_values, "tolist") else list(batch_values)
+            )
+            if len(batch_values) != len(df):
+                msg = f"{dummy_location.type}.{method}_batch() must return one value for each row."
+                raise Pop2netException(msg)
+            values.update(zip(df.index, batch_values))
 
-        return affiliated_agents
+        else:
+            for agent in missing_agents:
+                values[agent.id] = getattr(dummy_location, method)(agent)
+
+        return [values[agent.id] for agent in agents]
+
+    def _get_affiliated_agents(self, agents, dummy_location) -> list:
+        return [
+            agent
+            for agent, is_affiliated in zip(
+                agents,
+                self._get_method_values(dummy_location, "filter", agents),
+            )
+            if is_affiliated
+        ]
+
+    def _get_mother_locations(self, mother_cls) -> dict[int, list]:
+        # index the mother locations of all agents at once when they are first needed
+        if mother_cls not in self._mother_locations:
+            mother_locations: dict[int, list] = {}
+            for location in self.model.locations_of_type(mother_cls, include_subclasses=True):
+                for agent in location.agents:
+                    mother_locations.setdefault(agent.id, []).append(location)
+            self._mother_locations[mother_cls] = mother_locations
+        return self._mother_locations[mother_cls]
 
     def _get_mother_group_id(self, agent, dummy_location) -> str:
         if dummy_location.nest() is None:
             return "None"
 
         else:
-            # search for mother location assigned to this agent
-            n_mother_locations_found = 0
-            for location in agent.locations:
-                if isinstance(location, dummy_location.nest()):
-                    mother_location = location
-                    n_mother_locations_found += 1
+            # look up the mother locations assigned to this agent
+            mother_locations = self._get_mother_locations(dummy_location.nest()).get(agent.id, [])
+            n_mother_locations_found = len(mother_locations)
 
             # Check if the number of mother locations is not 1
             if n_mother_locations_found > 1:
@@ -205,6 +319,7 @@ class Creator:
             elif n_mother_locations_found == 0:
                 return "None"
 
+            mother_location = mother_locations[-1]
             return "-".join([str(mother_location.split_value), str(mother_location.group_id)])
 
     def _get_split_values(
@@ -212,36 +327,58 @@ class Creator:
         agents: list,
         dummy_location,
         allow_nesting: bool = False,
-    ) -> list[int | str]:
-        all_values = []
-        for agent in agents:
-            agent_values = utils._to_list(dummy_location.split(agent))
+    ) -> dict[int | str, list]:
+        """Bucket the agents by their split values in one pass.
+
+        Returns:
+            dict: Maps each split value, in order of first appearance, to the agents
+                that have this value, in the order of `agents`.
+        """
+        split_values: dict[int | str, list] = {}
+        for agent, agent_values in zip(
+            agents,
+            self._get_method_values(dummy_location, "split", agents),
+        ):
+            agent_values = utils._to_list(agent_values)
 
             if allow_nesting:
                 # Add mother location's value to the value of the lower level location
-                for i, value in enumerate(agent_values):
-                    mother_group_id = self._get_mother_group_id(agent, dummy_location)
-                    agent_values[i] = "-".join([mother_group_id, str(value)])
-                    temp_attr = f"_P2NTEMP_{dummy_location.type}_mother_group_id"
-                    setattr(agent, temp_attr, mother_group_id)
-                    self._temp_agent_attrs.append(temp_attr)
-
-            # Temporarely store group values as agent attribute
-            # to assign them to the corresponding location group later
-            agent._P2NTEMP_split_values = agent_values
-
-            for value in agent_values:
-                if value not in all_values:
-                    all_values.append(value)
-
-        return all_values
-
-    def _get_stick_value(self, agent, dummy_location):
-        stick_value = dummy_location.stick_together(agent)
-        if stick_value is None:
-            return "None" + str(agent.id)
-        else:
-            return stick_value
+                mother_group_id = self._get_mother_group_id(agent, dummy_location)
+                agent_values = ["-".join([mother_group_id, str(value)]) for value in agent_values]
+
+            # an agent belongs to each of its values only once
+            for value in dict.fromkeys(agent_values):
+                split_values.setdefault(value, []).append(agent)
+
+        return split_values
+
+    def _set_agent_attributes(self, agents: list, attributes: dict) -> None:
+        """Set attributes of many agents at once.
+
+        Values that are lists hold one value for each agent, all other values are set for all
+        agents. The attributes of columnar agents are written to the model's attribute store one
+        column at a time.
+        """
+        columnar_positions = []
+        rows = []
+        for position, agent in enumerate(agents):
+            if (
+                isinstance(agent, p2n.ColumnarAgent)
+                and agent._row is not None
+                and agent.model is self.model
+            ):
+                columnar_positions.append(position)
+                rows.append(agent._row)
+            else:
+                for name, values in attributes.items():
+                    setattr(agent, name, values[position] if isinstance(values, list) else values)
+
+        if rows:
+            all_columnar = len(rows) == len(agents)
+            for name, values in attributes.items():
+                if isinstance(values, list) and not all_columnar:
+                    values = [values[position] for position in columnar_positions]
+                self.model.agent_attributes.set_many(rows, name, values)
 
     def _get_groups(self, agents, location_cls) -> list[list]:
         overcrowding_i = 0
@@ -289,51 +426,57 @@ class Creator:
             # TODO:
             raise Exception
 
-        stick_values = {self._get_stick_value(agent, dummy_location) for agent in agents}
+        if dummy_location.placement not in ("first_fit", "best_fit"):
+            msg = f"{location_cls.__name__}.placement must be 'first_fit' or 'best_fit'."
+            raise Pop2netException(msg)
+        group_sizes = _GroupSizes(
+            sizes=[len(group) for group in groups],
+            best_fit=dummy_location.placement == "best_fit",
+        )
+
+        # bucket the agents by their stick value in one pass
+        sticky_groups: dict = {}
+        for agent, stick_value in zip(
+            agents,
+            self._get_method_values(dummy_location, "stick_together", agents),
+        ):
+            if stick_value is None:
+                stick_value = "None" + str(agent.id)
+            sticky_groups.setdefault(stick_value, []).append(agent)
 
         # dummy_location = self._create_dummy_location(location_cls)
 
         # for each group of sticky agents
-        for stick_value in stick_values:
-            sticky_agents = [
-                agent
-                for agent in agents
-                if self._get_stick_value(agent, dummy_location) == stick_value
-            ]
-
-            assigned = False
-
-            for _, group in enumerate(groups):
-                # if there are still enough free places available
-                if (dummy_location.n_agents is None) or dummy_location.n_agents - len(group) >= len(
-                    sticky_agents
-                ):
-                    # if sum(
-                    #    [dummy_location.find(agent) for agent in sticky_agents],
-                    # ) == len(sticky_agents):
-                    #    # assign agents
-                    for agent in sticky_agents:
-                        group.append(agent)
-                        dummy_location.add_agent(agent)
+        for stick_value in utils._set_order(sticky_groups):
+            sticky_agents = sticky_groups[stick_value]
+
+            # find a group with enough free places available
+            if dummy_location.n_agents is None:
+                group_i = group_sizes.find(max_size=math.inf)
+            else:
+                group_i = group_sizes.find(max_size=dummy_location.n_agents - len(sticky_agents))
 
-                    assigned = True
-                    break
+            if group_i is not None:
+                # assign agents
+                for agent in sticky_agents:
+                    groups[group_i].append(agent)
+                group_sizes.grow(group_i, len(sticky_agents))
 
-            if not assigned:
+            else:
                 if len(groups) < n_location_groups:
                     new_group = []
-                    dummy_location = self._create_dummy_location(location_cls)
                     # assign agents
                     for agent in sticky_agents:
                         new_group.append(agent)
-                        dummy_location.add_agent(agent)
 
                     groups.append(new_group)
+                    group_sizes.append(len(new_group))
 
                 else:
                     if not dummy_location.only_exact_n_agents and not n_location_groups_is_fixed:
                         for agent in sticky_agents:
                             groups[overcrowding_i].append(agent)
+                        group_sizes.grow(overcrowding_i, len(sticky_agents))
                         overcrowding_i = (overcrowding_i + 1) % len(groups)
 
         if dummy_location.only_exact_n_agents:
@@ -341,33 +484,18 @@ class Creator:
 
         return groups
 
-    def _get_split_value_affiliated_agents(
-        self,
-        agents: list,
-        split_value: int | str,
-    ) -> list:
-        group_affiliated_agents = [
-            agent for agent in agents if split_value in agent._P2NTEMP_split_values
-        ]
-
-        return group_affiliated_agents
-
     def _get_melted_groups(self, agents: list, location_cls) -> list[list]:
         dummy_location = self._create_dummy_location(location_cls)
 
-        # get all mother locations the agents are nested in
-        all_mother_group_ids = {
-            self._get_mother_group_id(agent, dummy_location) for agent in agents
-        }
+        # bucket the agents by the mother location they are nested in
+        agents_by_mother_group_id: dict[str, list] = {}
+        for agent in agents:
+            mother_group_id = self._get_mother_group_id(agent, dummy_location)
+            agents_by_mother_group_id.setdefault(mother_group_id, []).append(agent)
 
-        # for each mother location
-        for mother_group_id in all_mother_group_ids:
-            # get agents that are part of this location
-            nested_agents = [
-                agent
-                for agent in agents
-                if self._get_mother_group_id(agent, dummy_location) == mother_group_id
-            ]
+        # for each mother location and the agents that are part of it
+        for mother_group_id in utils._set_order(agents_by_mother_group_id):
+            nested_agents = agents_by_mother_group_id[mother_group_id]
 
             # a list that stores a list of groups for each location
             # [
@@ -403,15 +531,11 @@ class Creator:
                 )
 
                 for agent in melt_location_affiliated_agents:
-                    agent._P2NTEMP_melt_location_weight = melt_dummy_location.weight(agent)
+                    self._melt_location_weights[agent.id] = melt_dummy_location.weight(agent)
 
                 # for each split value: get groups and collect them in one list for all values
                 location_groups_to_melt: list[list] = []
-                for melt_split_value in melt_split_values:
-                    melt_split_value_affiliated_agents = self._get_split_value_affiliated_agents(
-                        agents=melt_location_affiliated_agents,
-                        split_value=melt_split_value,
-                    )
+                for melt_split_value_affiliated_agents in melt_split_values.values():
                     location_groups_to_melt.extend(
                         self._get_groups(
                             agents=melt_split_value_affiliated_agents,
@@ -461,26 +585,31 @@ class Creator:
         if agents is None:
             agents = self.model.agents
 
-        # self._dummy_model = p2n.Model()
-        self._dummy_model.add_agents(agents)
-
         for location_cls in location_classes:
             dummy_location = self._create_dummy_location(location_cls)
             str_location_cls = dummy_location.type
-            for agent in agents:
-                setattr(agent, str_location_cls, None)
-                setattr(agent, str_location_cls + "_assigned", False)
-                setattr(agent, str_location_cls + "_id", None)
-                setattr(agent, str_location_cls + "_position", None)
-                setattr(agent, str_location_cls + "_head", None)
-                setattr(agent, str_location_cls + "_tail", None)
+            self._set_agent_attributes(
+                agents,
+                {
+                    str_location_cls: None,
+                    str_location_cls + "_assigned": False,
+                    str_location_cls + "_id": None,
+                    str_location_cls + "_position": None,
+                    str_location_cls + "_head": None,
+                    str_location_cls + "_tail": None,
+                },
+            )
 
         locations = []
 
         # for each location class
         for location_cls in location_classes:
-            for agent in agents:
-                agent._P2NTEMP_melt_location_weight = None
+            # the locations created so far may be the mothers of this location class
+            self._mother_locations.clear()
+            # free the dummy locations of the previous location class
+            self._dummy_model = p2n.Model()
+
+            self._melt_location_weights.clear()
 
             # create location dummy in order to use the location's methods
             dummy_location = self._create_dummy_location(location_cls)
@@ -511,12 +640,21 @@ class Creator:
 
             # bridge
             if not dummy_location.melt():
+                # evaluate bridge() once for each agent
+                bridge_agents = self._get_affiliated_agents(
+                    agents=agents,
+                    dummy_location=dummy_location,
+                )
+                agent_bridge_values = self._bridge_values[str_location_cls] = dict(
+                    zip(
+                        [agent.id for agent in bridge_agents],
+                        self._get_method_values(dummy_location, "bridge", bridge_agents),
+                    ),
+                )
                 bridge_values = {
-                    dummy_location.bridge(agent)
-                    for agent in self._get_affiliated_agents(
-                        agents=agents, dummy_location=dummy_location
-                    )
-                    if dummy_location.bridge(agent) is not None
+                    bridge_value
+                    for bridge_value in agent_bridge_values.values()
+                    if bridge_value is not None
                 }
 
                 if len(bridge_values) == 0:
@@ -541,15 +679,14 @@ class Creator:
 
                     # create one MeltLocation for each bridge_value
                     for bridge_value in bridge_values:
-
-                        def filter(self, agent):
-                            return dummy_location.bridge(agent) == self.bridge_value
-
                         dummy_melt_class = type(
                             f"dummy_meltlocation{str(bridge_value)}",
                             (p2n.MeltLocation,),
                             {
-                                "filter": filter,
+                                "filter": _bridge_filter(
+                                    bridge=dummy_location.bridge,
+                                    agent_bridge_values=agent_bridge_values,
+                                ),
                                 "n_agents": 1,
                                 "bridge_value": bridge_value,
                             },
@@ -591,20 +728,20 @@ class Creator:
             )
 
             if len(split_values) == 0:
-                split_values.append("dummy_split_value")
+                split_values["dummy_split_value"] = []
+
+            if not dummy_location.melt() and self._uses_batch_method(
+                dummy_location, "stick_together"
+            ):
+                # one batch for all agents instead of one for each split value
+                self._get_method_values(dummy_location, "stick_together", affiliated_agents)
 
             group_count = 0
 
-            # for each group split value
-            for split_value in split_values:
+            # for each group split value and all agents with that value
+            for split_value, split_value_affiliated_agents in split_values.items():
                 split_value_locations = []
 
-                # get all agents with that value
-                split_value_affiliated_agents = self._get_split_value_affiliated_agents(
-                    agents=affiliated_agents,
-                    split_value=split_value,
-                )
-
                 # if this location does not glue together other locations
                 if not dummy_location.melt():
                     group_lists: list[list] = self._get_groups(
@@ -623,31 +760,23 @@ class Creator:
 
                     dummy_location = self._create_dummy_location(location_cls)
                     dummy_location.agents_ = group_list
+
+                    # the position of each agent in its group, by its first occurrence
+                    group_positions = {
+                        agent.id: position
+                        for position, agent in reversed(list(enumerate(group_list)))
+                    }
+
                     # dummy_location.add_agents(agents)
 
                     # dummy_location.group_agents = group_list
 
-                    # get all subgroub values
-                    subsplit_values = {
-                        agent_subsplit_value
-                        for agent in group_list
-                        for agent_subsplit_value in utils._to_list(
-                            dummy_location._subsplit(agent),
-                        )
-                    }
+                    # get the agents of all subgroups at once
+                    subsplit_agents = dummy_location._subsplit_agents()
 
                     # for each group of agents assigned to a specific sublocation
-                    for j, subsplit_value in enumerate(subsplit_values):
-                        # get all subsplit affiliated agents
-                        subsplit_affiliated_agents = []
-
-                        # for agent in group_affiliated_agents:
-                        for agent in group_list:
-                            agent_subsplit_value = utils._to_list(
-                                dummy_location._subsplit(agent),
-                            )
-                            if subsplit_value in agent_subsplit_value:
-                                subsplit_affiliated_agents.append(agent)
+                    for j, subsplit_value in enumerate(utils._set_order(subsplit_agents)):
+                        subsplit_affiliated_agents = subsplit_agents[subsplit_value]
 
                         # Build the final location
                         location = location_cls(model=self.model)
@@ -660,35 +789,51 @@ class Creator:
                         split_value_locations.append(location)
 
                         # Assigning process:
-                        for agent in subsplit_affiliated_agents:
-                            location.add_agent(agent)
-
-                            weight = (
-                                agent._P2NTEMP_melt_location_weight
-                                if agent._P2NTEMP_melt_location_weight is not None
-                                else location.weight(agent)
-                            )
-
-                            location.set_weight(
-                                agent=agent,
-                                weight=weight,
-                            )
-
-                            group_info_str = f"gv={location.split_value},gid={location.group_id}"
-                            setattr(agent, str_location_cls, group_info_str)
-                            setattr(agent, str_location_cls + "_assigned", True)
-                            setattr(agent, str_location_cls + "_id", group_count - 1)
-                            setattr(agent, str_location_cls + "_position", group_list.index(agent))
-                            setattr(
-                                agent,
-                                str_location_cls + "_head",
-                                True if group_list.index(agent) == 0 else False,
+                        # the weights of melted locations take precedence
+                        weights = [
+                            self._melt_location_weights.get(agent.id)
+                            for agent in subsplit_affiliated_agents
+                        ]
+                        unweighted = [k for k, weight in enumerate(weights) if weight is None]
+                        if unweighted:
+                            location_weights = location._get_weights(
+                                [subsplit_affiliated_agents[k] for k in unweighted],
                             )
-                            setattr(
-                                agent,
-                                str_location_cls + "_tail",
-                                True if group_list.index(agent) == (len(group_list) - 1) else False,
+                            for k, weight in zip(unweighted, location_weights):
+                                weights[k] = weight
+
+                        if type(location).add_agent is p2n.Location.add_agent:
+                            self.model.add_memberships(
+                                location_ids=[location.id] * len(subsplit_affiliated_agents),
+                                agent_ids=[agent.id for agent in subsplit_affiliated_agents],
+                                weights=weights,
                             )
+                        else:
+                            # a location's own add_agent is called for each agent
+                            for agent, weight in zip(subsplit_affiliated_agents, weights):
+                                location.add_agent(agent)
+                                location.set_weight(agent, 1 if weight is None else weight)
+
+                        positions = [
+                            group_positions[agent.id] for agent in subsplit_affiliated_agents
+                        ]
+                        self._set_agent_attributes(
+                            subsplit_affiliated_agents,
+                            {
+                                str_location_cls: (
+                                    f"gv={location.split_value},gid={location.group_id}"
+                                ),
+                                str_location_cls + "_assigned": True,
+                                str_location_cls + "_id": group_count - 1,
+                                str_location_cls + "_position": positions,
+                                str_location_cls + "_head": [
+                                    position == 0 for position in positions
+                                ],
+                                str_location_cls + "_tail": [
+                                    position == len(group_list) - 1 for position in positions
+                                ],
+                            },
+                        )
 
                         locations.append(location)
 
@@ -715,11 +860,14 @@ class Creator:
         for location in locations:
             location.refine()
 
-        # delete temporary agent attributes
-        for agent in self._dummy_model.agents:
-            for attr in self._temp_agent_attrs:
-                if hasattr(agent, attr):
-                    delattr(agent, attr)
+        # delete the temporary state of the agents and the dummy locations
+        self._method_values.clear()
+        self._melt_location_weights.clear()
+        for agent_bridge_values in self._bridge_values.values():
+            # the filters of the generated melt locations evaluate bridge() again in a later call
+            agent_bridge_values.clear()
+        self._bridge_values.clear()
+        self._dummy_model = p2n.Model()
 
         return locations
 
@@ -808,7 +956,7 @@ class Creator:
             msg = "There are no agents."
             raise Pop2netException(msg)
 
-        df = pd.DataFrame([vars(agent) for agent in self.agents])
+        df = pd.DataFrame([utils._get_vars(agent) for agent in self.agents])
 
         if drop_agentpy_columns:
             df = df.drop(
@@ -826,3 +974,103 @@ class Creator:
             df = df.loc[:, columns]
 
         return df
+
+
+def _bridge_filter(bridge, agent_bridge_values: dict):
+    """Return the filter of a melt location created for one value of a location's bridge().
+
+    The filter reads the agent's bridge value from a table that is shared by the melt locations of
+    all values, so that bridge() is called only once for each agent.
+    """
+
+    def filter(self, agent):
+        if agent.id not in agent_bridge_values:
+            agent_bridge_values[agent.id] = bridge(agent)
+        return agent_bridge_values[agent.id] == self.bridge_value
+
+    return filter
+
+
+class _GroupSizes:
+    """The sizes of location groups, to find a group with enough free places in O(log G).
+
+    For first fit, the sizes are kept in a segment tree of minimums, which gives the first group
+    that is small enough. For best fit, they are kept sorted, which gives the largest group that
+    is small enough (the first one of those, if there are several).
+    """
+
+    def __init__(self, sizes: list[int], best_fit: bool = False) -> None:
+        self.best_fit = best_fit
+        self._sizes: list[int] = []
+        self._sorted: list[tuple[int, int]] = []
+        self._capacity = 1
+        self._tree = [math.inf, math.inf]
+        for size in sizes:
+            self.append(size)
+
+    def append(self, size: int) -> None:
+        """Add a new group."""
+        i = len(self._sizes)
+        self._sizes.append(size)
+
+        if self.best_fit:
+            bisect.insort(self._sorted, (size, -i))
+            return
+
+        if i == self._capacity:
+            # double the capacity of the tree
+            self._capacity *= 2
+            self._tree = [math.inf] * (2 * self._capacity)
+            self._tree[self._capacity : self._capacity + i] = self._sizes[:i]
+            for node in range(self._capacity - 1, 0, -1):
+                self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+        self._update(i)
+
+    def grow(self, i: int, n: int) -> None:
+        """Add n agents to the i-th group."""
+        if self.best_fit:
+            del self._sorted[bisect.bisect_left(self._sorted, (self._sizes[i], -i))]
+            self._sizes[i] += n
+            bisect.insort(self._sorted, (self._sizes[i], -i))
+        else:
+            self._sizes[i] += n
+            self._update(i)
+
+    def find(self, max_size: float) -> int | None:
+        """Return the index of a group with at most max_size agents, or None."""
+        if self.best_fit:
+            position = bisect.bisect_right(self._sorted, (max_size, math.inf))
+            return -self._sorted[position - 1][1] if position > 0 else None
+
+        if self._tree[1] > max_size:
+            return None
+        node = 1
+        while node < self._capacity:
+            node = 2 * node if self._tree[2 * node] <= max_size else 2 * node + 1
+        return node - self._capacity
+
+    def _update(self, i: int) -> None:
+        node = self._capacity + i
+        self._tree[node] = self._sizes[i]
+        node //= 2
+        while node >= 1:
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+
+def _column(values: list) -> np.ndarray:
+    # NumPy converts a column of numbers or strings of one type quickly, but mixed columns have to
+    # be filled value by value, because NumPy would convert them to strings or unpack sequence-like
+    # values
+    types = set(map(type, values))
+    if len(types) == 1:
+        value_type = types.pop()
+        if issubclass(value_type, (bool, int, float, np.number, np.bool_)):
+            return np.array(values)
+        if issubclass(value_type, str):
+            return np.array(values, dtype=object)
+
+    array = np.empty(len(values), dtype=object)
+    for i, value in enumerate(values):
+        array[i] = value
+    return pd.Series(array).infer_objects().to_numpy()
@@ -2,11 +2,13 @@
 
 from __future__ import annotations
 
+import itertools
 import typing
 
 from bokehgraph import BokehBipartiteGraph
 from bokehgraph import BokehGraph
 import networkx as nx
+import numpy as np
 import pandas as pd
 import seaborn as sns
 from tabulate import tabulate
@@ -253,52 +255,54 @@ class NetworkInspector:
         if agents is None:
             agents = self.model.agents
 
-        contact_data = []
-        attr_values = []
-        pairs = []
-
-        attr_u_name = f"{attr}_u"
-        attr_v_name = f"{attr}_v"
-
-        for agent_u in agents:
-            attr_u = getattr(agent_u, attr)
-            if attr_u is not None:
-                attr_values.append(attr_u)
-
-                for agent_v in agent_u.neighbors():
-                    attr_v = getattr(agent_v, attr)
-                    if attr_v is not None:
-                        attr_values.append(attr_v)
-
-                        pair = {agent_u.id, agent_v.id}
-
-                        if pair not in pairs:
-                            contact_data.append(
-                                {
-                                    "id_u": agent_u.id,
-                                    attr_u_name: attr_u,
-                                    "id_v": agent_v.id,
-                                    attr_v_name: attr_v,
-                                    "weight": agent_u.get_agent_weight(agent_v),
-                                },
-                            )
-                            pairs.append(pair)
-
-        attr_values = list(set(attr_values))
-
-        df = pd.DataFrame(index=sorted(attr_values, reverse=True), columns=sorted(attr_values))
-        df = df.fillna(0)
-
-        weight_total = 0
-        for contact in contact_data:
-            weight = contact["weight"] if weighted else 1
-            weight_total += weight
-
-            df.loc[contact[attr_u_name], contact[attr_v_name]] = (
-                df.loc[contact[attr_u_name], contact[attr_v_name]] + weight
+        model_agents = list(self.model.agents)
+        positions = {agent.id: i for i, agent in enumerate(model_agents)}
+
+        # weights of all pairs of neighbors, combined by the locations' projection rules
+        matrix = self.model.export_agent_network(return_sparse=True).tocoo()
+
+        selected = np.zeros(len(model_agents), dtype=bool)
+        selected[[positions[agent.id] for agent in agents]] = True
+
+        # contacts of the given agents
+        outgoing = selected[matrix.row]
+        rows, cols, weights = matrix.row[outgoing], matrix.col[outgoing], matrix.data[outgoing]
+
+        values = {}
+        has_value = np.zeros(len(model_agents), dtype=bool)
+        for i in itertools.chain(np.flatnonzero(selected).tolist(), cols.tolist()):
+            if i not in values:
+                values[i] = getattr(model_agents[i], attr)
+                has_value[i] = values[i] is not None
+
+        valid = has_value[rows] & has_value[cols]
+        attr_values = {values[i] for i in np.flatnonzero(selected & has_value).tolist()}
+        attr_values.update(values[j] for j in cols[valid].tolist())
+
+        # count each pair only once
+        keep = valid & (~selected[cols] | (rows < cols))
+        attr_u = [values[i] for i in rows[keep].tolist()]
+        attr_v = [values[j] for j in cols[keep].tolist()]
+        weights = weights[keep] if weighted else np.ones(keep.sum())
+
+        index = sorted(attr_values, reverse=True)
+        columns = sorted(attr_values)
+        if len(weights) == 0:
+            df = pd.DataFrame(0, index=index, columns=columns)
+        else:
+            contacts = pd.DataFrame(
+                {
+                    "u": attr_u + attr_v,
+                    "v": attr_v + attr_u,
+                    "weight": np.concatenate([weights, weights]),
+                },
             )
-            df.loc[contact[attr_v_name], contact[attr_u_name]] = (
-                df.loc[contact[attr_v_name], contact[attr_u_name]] + weight
+            df = (
+                contacts.groupby(["u", "v"])["weight"]
+                .sum()
+                .unstack(fill_value=0)
+                .reindex(index=index, columns=columns, fill_value=0)
+                .rename_axis(index=None, columns=None)
             )
 
         if plot:
@@ -398,12 +402,10 @@ class NetworkInspector:
                 agent_attributes = [agent_attributes]
 
         # determine eligible locations classes
-        valid_locations = []
         if select_locations:
-            for location_instance in self.model.locations:
-                for locationtype in select_locations:
-                    if isinstance(location_instance, locationtype):
-                        valid_locations.append(location_instance)
+            valid_locations = list(
+                self.model.locations_of_type(select_locations, include_subclasses=True),
+            )
         else:
             valid_locations = list(self.model.locations)
 
@@ -413,7 +415,9 @@ class NetworkInspector:
             if agent_attributes:
                 for i, location_instance in enumerate(valid_locations):
                     title = f'{i+1}.Location: {str(location_instance).split(" ")[0]}'
-                    df = pd.DataFrame([vars(agent) for agent in location_instance.agents])
+                    df = pd.DataFrame(
+                        [utils._get_vars(agent) for agent in location_instance.agents],
+                    )
                     df = df[list(agent_attributes)]
                     agent_dfs[title] = df
 
@@ -439,7 +443,7 @@ class NetworkInspector:
             for i, location_instance in enumerate(valid_locations):
                 title = f'{i+1}.Location: {str(location_instance).split(" ")[0]}'
                 location_type = str(location_instance).split(" ")[0]
-                df = pd.DataFrame([vars(agent) for agent in location_instance.agents])
+                df = pd.DataFrame([utils._get_vars(agent) for agent in location_instance.agents])
 
                 # only keep wanted columns (agent attributes)
                 df = df[list(agent_attributes)]
@@ -510,12 +514,10 @@ class NetworkInspector:
                 agent_attributes = [agent_attributes]
 
         # determine eligible locations classes
-        valid_locations = []
         if select_locations:
-            for location_instance in self.model.locations:
-                for locationtype in select_locations:
-                    if isinstance(location_instance, locationtype):
-                        valid_locations.append(location_instance)
+            valid_locations = list(
+                self.model.locations_of_type(select_locations, include_subclasses=True),
+            )
         else:
             valid_locations = list(self.model.locations)
 
@@ -527,7 +529,7 @@ class NetworkInspector:
                 title = f'{i+1}.Location: {str(location_instance).split(" ")[0]}'
                 location_type = str(location_instance).split(" ")[0]
                 # get all agents per location instance, subset df by agent-attributes
-                df = pd.DataFrame([vars(agent) for agent in location_instance.agents])
+                df = pd.DataFrame([utils._get_vars(agent) for agent in location_instance.agents])
                 df = df[list(agent_attributes)]
                 df["location_type"] = location_type
                 agent_dfs[title] = df
@@ -535,7 +537,7 @@ class NetworkInspector:
             for i, location_instance in enumerate(valid_locations):
                 title = f'{i+1}.Location: {str(location_instance).split(" ")[0]}'
                 location_type = str(location_instance).split(" ")[0]
-                df = pd.DataFrame([vars(agent) for agent in location_instance.agents])
+                df = pd.DataFrame([utils._get_vars(agent) for agent in location_instance.agents])
                 df.drop(df.iloc[:, 0:7], axis=1, inplace=True)
                 df["location_type"] = location_type
                 agent_dfs[title] = df
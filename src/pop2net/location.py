@@ -5,6 +5,8 @@ from __future__ import annotations
 from agentpy.objects import Object
 from agentpy.sequences import AgentList
 import networkx as nx
+import numpy as np
+import pandas as pd
 
 import pop2net.utils as utils
 
@@ -45,11 +47,19 @@ class Location(Object):
     def add_agents(self, agents: list) -> None:
         """Add multiple agents at once.
 
+        The agents are added in one pass, unless a subclass overwrites :meth:`add_agent`, which
+        is then called for each agent.
+
         Args:
             agents (list): An iterable over agents.
         """
-        for agent in agents:
-            self.add_agent(agent)
+        if type(self).add_agent is not Location.add_agent:
+            for agent in agents:
+                self.add_agent(agent)
+            return
+
+        agent_ids = [agent.id for agent in agents]
+        self.model.add_memberships(location_ids=[self.id] * len(agent_ids), agent_ids=agent_ids)
 
     def remove_agent(self, agent: _agent.Agent) -> None:
         """Removes the given agent from this location.
@@ -65,11 +75,19 @@ class Location(Object):
     def remove_agents(self, agents: list) -> None:
         """Remove multiple agents at once.
 
+        The agents are removed in one pass, unless a subclass overwrites :meth:`remove_agent`,
+        which is then called for each agent.
+
         Args:
             agents (list): An iterable over agents.
         """
-        for agent in agents:
-            self.remove_agent(agent=agent)
+        if type(self).remove_agent is not Location.remove_agent:
+            for agent in agents:
+                self.remove_agent(agent=agent)
+            return
+
+        agent_ids = [agent.id for agent in agents]
+        self.model.remove_memberships(location_ids=[self.id] * len(agent_ids), agent_ids=agent_ids)
 
     def neighbors(self, agent: _agent.Agent) -> AgentList:
         """Returns a list of agents which are connected to the given agent via this location.
@@ -111,17 +129,41 @@ class Location(Object):
         Can be completely rewritten to have location-specific methods of this kind with the same
         name or can be used as it is in the simulation code.
 
+        By default, this is the minimum of both weights. If :meth:`project_weights_batch` is
+        overwritten, the weights are combined by it instead, so overwriting
+        :meth:`project_weights_batch` is enough to change the projection rule everywhere.
+        Overwrite this method instead if the rule needs more than the two weights, e.g. other
+        agent attributes.
+
         Args:
             agent1: First agent of the pair.
             agent2: Second agent of the pair.
 
-        Raises:
-            Exception: Raised if `self.weight_projection_function` is not in ["average", "simultan"]
-
         Returns:
             Combined edge weight.
         """
-        return min([self.get_weight(agent1), self.get_weight(agent2)])
+        if type(self).project_weights_batch is Location.project_weights_batch:
+            return min(self.get_weight(agent1), self.get_weight(agent2))
+        return self.project_weights_batch(
+            np.array([self.get_weight(agent1)]),
+            np.array([self.get_weight(agent2)]),
+        )[0].item()
+
+    def project_weights_batch(self, weights_u: np.ndarray, weights_v: np.ndarray) -> np.ndarray:
+        """Calculates the edge weights of many pairs of agents assigned to this location at once.
+
+        This is the vectorized counterpart of :meth:`project_weights`. It is used when the
+        weights of all pairs of agents at this location are needed, e.g. by
+        :meth:`pop2net.Model.export_agent_network`. The default takes the minimum of both weights.
+
+        Args:
+            weights_u: The weights of the first agents of the pairs.
+            weights_v: The weights of the second agents of the pairs.
+
+        Returns:
+            The combined edge weight of each pair.
+        """
+        return np.minimum(weights_u, weights_v)
 
 
 class MagicLocation(Location):
@@ -132,6 +174,8 @@ class MagicLocation(Location):
     only_exact_n_agents: bool = False
     n_locations: int | None = None
     static_weight: bool = False
+    weight_attrs: tuple[str, ...] = ()
+    placement: str = "first_fit"
     recycle: bool = True
     nxgraph: nx.Graph | None = None
 
@@ -168,6 +212,26 @@ class MagicLocation(Location):
         """
         return True
 
+    def filter_batch(self, df: pd.DataFrame) -> pd.Series:
+        """Check for many agents at once whether they are meant to join this type of location.
+
+        This is the vectorized counterpart of :meth:`filter`. If it is overwritten, the Creator
+        uses it instead of :meth:`filter`, e.g. `return df["status"] == "pupil"`.
+
+        The DataFrame for this and the other batch methods holds all attributes of the agents.
+        For :class:`pop2net.ColumnarAgent`, it is sliced from the model's attribute store, which
+        makes batch methods faster than their per-agent counterparts. For other agents, it has to
+        be collected agent by agent, which only pays off if the per-agent method is expensive.
+
+        Args:
+            df: The attributes of the agents that are currently processed by the Creator, with one
+                row per agent, indexed by the agents' ids.
+
+        Returns:
+            One bool for each row of `df`.
+        """
+        return pd.Series(True, index=df.index)
+
     def bridge(self, agent: _agent.Agent) -> float | str | list | None:  # noqa: ARG002
         """Create locations with one agent for each unique value returned.
 
@@ -182,6 +246,21 @@ class MagicLocation(Location):
         """
         return None
 
+    def bridge_batch(self, df: pd.DataFrame) -> pd.Series:
+        """Return the bridge values of many agents at once.
+
+        This is the vectorized counterpart of :meth:`bridge`. If it is overwritten, the Creator
+        uses it instead of :meth:`bridge`.
+
+        Args:
+            df: The attributes of the agents that are currently processed by the Creator, with one
+                row per agent, indexed by the agents' ids.
+
+        Returns:
+            One value for each row of `df`.
+        """
+        return pd.Series(None, index=df.index, dtype=object)
+
     def split(self, agent: _agent.Agent) -> float | str | list | None:  # noqa: ARG002
         """Creates seperate location instances for each unique returned value.
 
@@ -194,6 +273,21 @@ class MagicLocation(Location):
         """
         return None
 
+    def split_batch(self, df: pd.DataFrame) -> pd.Series:
+        """Return the split values of many agents at once.
+
+        This is the vectorized counterpart of :meth:`split`. If it is overwritten, the Creator
+        uses it instead of :meth:`split`, e.g. `return df["household"]`.
+
+        Args:
+            df: The attributes of the agents that are currently processed by the Creator, with one
+                row per agent, indexed by the agents' ids.
+
+        Returns:
+            One value or list of values for each row of `df`.
+        """
+        return pd.Series(None, index=df.index, dtype=object)
+
     def weight(self, agent: _agent.Agent) -> float | None:  # noqa: ARG002
         """Defines the edge weight between the agent and the location instance.
 
@@ -209,6 +303,27 @@ class MagicLocation(Location):
         """
         return None
 
+    def weight_batch(self, attributes: dict[str, np.ndarray]) -> np.ndarray:
+        """Defines the edge weights of all agents at this location instance at once.
+
+        This is the vectorized counterpart of :meth:`weight`. If it is overwritten, it is used
+        instead of :meth:`weight` when the Creator assigns agents to the location, and to refresh
+        the weights of the location's agents on each simulation step, unless `static_weight` is
+        True.
+
+        By default, it calls :meth:`weight` for the agent of each id in `attributes`.
+
+        Args:
+            attributes: An array of each agent attribute listed in `weight_attrs`, plus the
+                agents' "id", with one entry per agent.
+
+        Returns:
+            The edge weight of each agent, in the order of `attributes`.
+        """
+        agents = self.model.get_agents(attributes["id"].tolist())
+        weights = [self.weight(agent) for agent in agents]
+        return np.array([1 if weight is None else weight for weight in weights], dtype=float)
+
     def stick_together(self, agent: _agent.Agent) -> float | str:
         """Assigns agents with a shared value on an attribute to the same location instance.
 
@@ -220,6 +335,21 @@ class MagicLocation(Location):
         """
         return agent.id
 
+    def stick_together_batch(self, df: pd.DataFrame) -> pd.Series:
+        """Return the values that define the groups of many agents at once.
+
+        This is the vectorized counterpart of :meth:`stick_together`. If it is overwritten, the
+        Creator uses it instead of :meth:`stick_together`.
+
+        Args:
+            df: The attributes of the agents that are currently processed by the Creator, with one
+                row per agent, indexed by the agents' ids.
+
+        Returns:
+            One value for each row of `df`.
+        """
+        return df["id"]
+
     def nest(self) -> type[Location] | None:
         """Nests this location class into another location class.
 
@@ -254,10 +384,26 @@ class MagicLocation(Location):
         """
         self.set_weight(agent, self.weight(agent))
 
+    def _get_weights(self, agents: list) -> np.ndarray | list:
+        """Return the weight of each of the given agents, using weight_batch if it is overwritten.
+
+        Args:
+            agents: The agents.
+
+        Returns:
+            The weights, which are None where weight() returns None.
+        """
+        if type(self).weight_batch is MagicLocation.weight_batch:
+            return [self.weight(agent) for agent in agents]
+        attributes = {
+            attr: np.array([getattr(agent, attr) for agent in agents])
+            for attr in ["id", *self.weight_attrs]
+        }
+        return np.asarray(self.weight_batch(attributes), dtype=np.float64)
+
     def _update_weights(self) -> None:
         """Update the weight of every agent on this location."""
-        for agent_ in self.agents:
-            self._update_weight(agent_)
+        self.model.set_location_weights(self, self._get_weights(self.agents))
 
     def _subsplit(self, agent: _agent.Agent) -> str | float | list | None:  # noqa: ARG002
         """Splits a location instance into sub-instances to create a certain network structure.
@@ -285,6 +431,43 @@ class MagicLocation(Location):
             else:
                 return None
 
+    def _subsplit_agents(self) -> dict:
+        """Returns the agents of each sub-instance of this location instance.
+
+        With an `nxgraph`, the sub-instances are taken directly from the graph's edges: the i-th
+        agent takes the place of the i-th node, and each edge becomes a sub-instance of the agents
+        at its two nodes. Otherwise `_subsplit` is called once for each agent.
+
+        Returns:
+            dict: The agents of each subsplit value, in order of first appearance.
+        """
+        if self.nxgraph is None or type(self)._subsplit is not MagicLocation._subsplit:
+            agent_values = [utils._to_list(self._subsplit(agent)) for agent in self.agents_]
+        else:
+            nodes = list(self.nxgraph.nodes)
+            first_positions: dict = {}
+            for position, agent in enumerate(self.agents_):
+                first_positions.setdefault(agent.id, position)
+
+            agent_values = []
+            for agent in self.agents_:
+                position = first_positions[agent.id]
+                if position < len(nodes):
+                    agent_values.append(
+                        [
+                            utils._join_positions(pos1=nodes[position], pos2=neighbor)
+                            for neighbor in self.nxgraph.neighbors(nodes[position])
+                        ],
+                    )
+                else:
+                    agent_values.append([None])
+
+        subsplit_agents: dict = {}
+        for agent, values in zip(self.agents_, agent_values):
+            for value in dict.fromkeys(values):
+                subsplit_agents.setdefault(value, []).append(agent)
+        return subsplit_agents
+
 
 class MeltLocation(Location):
     """Helper class to melt locations."""
@@ -293,6 +476,7 @@ class MeltLocation(Location):
     overcrowding: bool | None = None
     only_exact_n_agents: bool = False
     n_locations: int | None = None
+    placement: str = "first_fit"
 
     def filter(self, agent: _agent.Agent) -> bool:  # noqa: ARG002
         """Check whether the agent is meant to join this type of location.
@@ -9,12 +9,17 @@ import warnings
 import agentpy as ap
 from agentpy import AgentList
 import networkx as nx
+import numpy as np
+import scipy.sparse as sp
 
 if typing.TYPE_CHECKING:
     from . import agent as _agent
     from . import location as _location
+    from . import storage as _storage
 
+from pop2net.attributes import AttributeStore
 from pop2net.sequences import LocationList
+from pop2net.storage import NetworkxStorage
 import pop2net.utils as utils
 
 
@@ -23,8 +28,22 @@ class Model(ap.Model):
 
     This very closely follows the logic of the :class:`agentpy.Model` package. See
     :class:`agentpy.Model` for more information.
+
+    Attributes:
+        storage_class: The storage backend that holds the model's agents, locations and their
+            memberships. Defaults to :class:`pop2net.storage.NetworkxStorage`. Set it to
+            :class:`pop2net.storage.ArrayStorage` in a subclass to keep the network in compact
+            NumPy arrays, which is much leaner for very large populations.
+        agent_attributes: The columns of the attributes of all :class:`pop2net.ColumnarAgent`
+            instances of the model.
+        cache_neighbors: Whether the results of :meth:`neighbors_of_agent` are cached. Cached
+            entries are dropped whenever the memberships of the affected agents change. Use
+            :meth:`neighbor_cache_info` to check whether the cache pays off. Defaults to False.
     """
 
+    storage_class: type[_storage.Storage] = NetworkxStorage
+    cache_neighbors: bool = False
+
     def __init__(self, parameters=None, _run_id=None, **kwargs):
         """Initiate a simulation.
 
@@ -36,17 +55,33 @@ class Model(ap.Model):
             **kwargs: Optional parameters that are all passed to :class:`agentpy.Model`.
         """
         super().__init__(parameters, _run_id, **kwargs)
-        self.g = nx.Graph()
+        self._storage = self.storage_class()
+        self.agent_attributes = AttributeStore()
+
+        # class -> id -> object, and agent id -> location class -> location id -> location
+        self._agent_types: dict[type, dict[int, _agent.Agent]] = {}
+        self._location_types: dict[type, dict[int, _location.Location]] = {}
+        self._agent_location_types: dict[int, dict[type, dict[int, _location.Location]]] = {}
+
+        # agent id -> class filter -> neighbors
+        self._neighbor_cache: dict[int, dict[frozenset | None, list]] = {}
+        self._neighbor_cache_hits = 0
+        self._neighbor_cache_misses = 0
+
+        # locations whose weights are refreshed on each step, and locations not checked yet
+        self._weight_registry: dict[int, _location.Location] = {}
+        self._unchecked_locations: dict[int, _location.Location] = {}
 
     def sim_step(self) -> None:
         """Do 1 step in the simulation."""
         self.t += 1
 
-        # TODO: Rethink the following:
-        for location in self.locations:
-            if hasattr(location, "static_weight") and hasattr(location, "_update_weights"):
-                if not location.static_weight:
-                    location._update_weights()
+        if self._unchecked_locations:
+            self.update_weight_registry(list(self._unchecked_locations.values()))
+            self._unchecked_locations = {}
+
+        for location in list(self._weight_registry.values()):
+            location._update_weights()
 
         self.step()
         self.update()
@@ -54,47 +89,152 @@ class Model(ap.Model):
         if self.t >= self._steps:  # type: ignore
             self.running = False
 
+    def update_weight_registry(self, locations: list | None = None) -> None:
+        """Check which locations need their weights to be refreshed on each step.
+
+        Only locations that have a `static_weight` attribute set to False and an
+        `_update_weights` method, like a :class:`pop2net.MagicLocation` with dynamic weights,
+        are refreshed by :meth:`sim_step`. Locations are checked once before the first step
+        after they have been added to the model. Call this method if `static_weight` of a
+        location changes later on.
+
+        Args:
+            locations: The locations to be checked. Defaults to None, which checks all
+                locations of the model.
+        """
+        if locations is None:
+            locations = self._storage.locations.values()
+
+        for location in locations:
+            if self._storage.locations.get(location.id) is not location:
+                continue
+            static = getattr(location, "static_weight", True)
+            if not static and hasattr(location, "_update_weights"):
+                self._weight_registry[location.id] = location
+            else:
+                self._weight_registry.pop(location.id, None)
+
+    @property
+    def g(self) -> nx.Graph:
+        """The bipartite network of agents and locations.
+
+        With the default :class:`pop2net.storage.NetworkxStorage`, this is the graph the model
+        works on. Other storage backends build the graph on each access.
+
+        Returns:
+            nx.Graph: The bipartite network.
+        """
+        return self._storage.to_networkx()
+
     @property
     def agents(self) -> AgentList:
         """Show a iterable view of all agents in the environment.
 
+        The agents are kept in an index that is updated whenever agents are added or removed,
+        so this does not scan the network. Changing the returned list does not change the model.
+
         Returns:
             AgentList: A non-mutable AgentList of all agents in the environment.
         """
-        return AgentList(
-            model=self.model,
-            objs=[data["_obj"] for _, data in self.g.nodes(data=True) if data["bipartite"] == 0],
-        )
+        return AgentList(model=self.model, objs=self._storage.agents.values())
 
     @property
     def agents_by_id(self) -> dict:
         """Returns a dictionary which stores the model's agents by their id.
 
+        The dictionary is a copy of the model's agent index. Use :meth:`get_agent` to look up
+        single agents without copying the index.
+
         Returns:
             dict: A dictionary which stores the model's agents by their id.
         """
-        return {agent.id: agent for agent in self.agents}
+        return dict(self._storage.agents)
 
     @property
     def locations_by_id(self) -> dict:
         """Returns a dictionary which stores the model's locations by their id.
 
+        The dictionary is a copy of the model's location index. Use :meth:`get_location` to look
+        up single locations without copying the index.
+
         Returns:
             dict: A dictionary which stores the model's locations by their id.
         """
-        return {location.id: location for location in self.locations}
+        return dict(self._storage.locations)
+
+    def get_agent(self, agent_id: int) -> _agent.Agent:
+        """Return the agent with the given id.
+
+        Args:
+            agent_id (int): The id of the agent.
+
+        Raises:
+            KeyError: Raised if there is no agent with this id in the model.
+
+        Returns:
+            Agent: The agent.
+        """
+        return self._storage.agents[agent_id]
+
+    def get_agents(self, agent_ids: typing.Iterable[int]) -> AgentList:
+        """Return the agents with the given ids.
+
+        Args:
+            agent_ids (typing.Iterable[int]): The ids of the agents.
+
+        Raises:
+            KeyError: Raised if one of the ids does not belong to an agent in the model.
+
+        Returns:
+            AgentList: The agents in the order of the given ids.
+        """
+        agents = self._storage.agents
+        return AgentList(model=self.model, objs=[agents[agent_id] for agent_id in agent_ids])
+
+    def get_location(self, location_id: int) -> _location.Location:
+        """Return the location with the given id.
+
+        Args:
+            location_id (int): The id of the location.
+
+        Raises:
+            KeyError: Raised if there is no location with this id in the model.
+
+        Returns:
+            Location: The location.
+        """
+        return self._storage.locations[location_id]
+
+    def get_locations(self, location_ids: typing.Iterable[int]) -> LocationList:
+        """Return the locations with the given ids.
+
+        Args:
+            location_ids (typing.Iterable[int]): The ids of the locations.
+
+        Raises:
+            KeyError: Raised if one of the ids does not belong to a location in the model.
+
+        Returns:
+            LocationList: The locations in the order of the given ids.
+        """
+        locations = self._storage.locations
+        return LocationList(
+            model=self.model,
+            objs=[locations[location_id] for location_id in location_ids],
+        )
 
     @property
     def locations(self) -> LocationList:
         """Show a iterable view of all locations in the environment.
 
+        The locations are kept in an index that is updated whenever locations are added or
+        removed, so this does not scan the network. Changing the returned list does not change
+        the model.
+
         Returns:
             LocationList: a non-mutable LocationList of all locations in the environment.
         """
-        return LocationList(
-            model=self.model,
-            objs=[data["_obj"] for _, data in self.g.nodes(data=True) if data["bipartite"] == 1],
-        )
+        return LocationList(model=self.model, objs=self._storage.locations.values())
 
     def add_agent(self, agent: _agent.Agent) -> None:
         """Add an agent to the environment.
@@ -105,8 +245,8 @@ class Model(ap.Model):
         Args:
             agent: Agent to be added to the environment.
         """
-        if not self.g.has_node(agent.id):
-            self.g.add_node(agent.id, bipartite=0, _obj=agent)
+        self._storage.add_agent(agent)
+        self._agent_types.setdefault(type(agent), {})[agent.id] = agent
 
     def add_agents(self, agents: list) -> None:
         """Add agents to the environment.
@@ -126,8 +266,9 @@ class Model(ap.Model):
         Args:
             location: Location to be added to the environment.
         """
-        if not self.g.has_node(location.id):
-            self.g.add_node(location.id, bipartite=1, _obj=location)
+        self._storage.add_location(location)
+        self._location_types.setdefault(type(location), {})[location.id] = location
+        self._unchecked_locations[location.id] = location
 
     def add_locations(self, locations: list) -> None:
         """Add multiple locations to the environment at once.
@@ -161,15 +302,65 @@ class Model(ap.Model):
             Exception: Raised if the agent does not exist in the environment.
         """
         # TODO: Create custom exceptions
-        if not self.g.has_node(location.id):
+        if not self._storage.has_location(location.id):
             msg = f"Location {location} does not exist in Environment!"
             raise Exception(msg)
-        if not self.g.has_node(agent.id):
+        if not self._storage.has_agent(agent.id):
             msg = f"Agent {agent} does not exist in Environment!"
             raise Exception(msg)
 
-        self.g.add_edge(agent.id, location.id, **kwargs)
-        self.set_weight(agent=agent, location=location, weight=weight)
+        self._storage.add_membership(
+            agent.id,
+            location.id,
+            weight=1 if weight is None else weight,
+            **kwargs,
+        )
+        self._index_memberships([agent.id], [location])
+        self._invalidate_neighbors([location])
+
+    def add_memberships(
+        self,
+        location_ids: typing.Iterable[int],
+        agent_ids: typing.Iterable[int],
+        weights: float | typing.Iterable[float | None] | None = None,
+        **kwargs,
+    ) -> None:
+        """Add many agents to locations at once.
+
+        The i-th agent is added to the i-th location. This is much faster than calling
+        :meth:`add_agent_to_location` for each membership, because all ids are validated once and
+        all memberships are inserted in one pass. All additional keyword arguments will be edge
+        attributes for all of these connections.
+
+        Args:
+            location_ids: The ids of the locations.
+            agent_ids: The ids of the agents, one for each location id.
+            weights: A weight for all memberships or one weight for each membership. A weight of
+                None is stored as 1. Defaults to None.
+            **kwargs: Additional edge attributes.
+
+        Raises:
+            Exception: Raised if the numbers of ids or weights do not match.
+            Exception: Raised if a location does not exist in the environment.
+            Exception: Raised if an agent does not exist in the environment.
+        """
+        location_ids = list(location_ids)
+        agent_ids = list(agent_ids)
+
+        if weights is None or isinstance(weights, (int, float)):
+            weights = [1 if weights is None else weights] * len(agent_ids)
+        else:
+            weights = [1 if weight is None else weight for weight in weights]
+
+        if not len(location_ids) == len(agent_ids) == len(weights):
+            msg = "`location_ids`, `agent_ids` and `weights` must have the same length."
+            raise Exception(msg)
+
+        self._check_ids(location_ids=location_ids, agent_ids=agent_ids)
+        self._storage.add_memberships(agent_ids, location_ids, weights, **kwargs)
+        locations = self._locations_of_ids(location_ids)
+        self._index_memberships(agent_ids, locations)
+        self._invalidate_neighbors(locations)
 
     def remove_agent(self, agent: _agent.Agent) -> None:
         """Remove an agent from the environment.
@@ -179,17 +370,22 @@ class Model(ap.Model):
         Args:
             agent: Agent to be removed.
         """
-        if self.g.has_node(agent.id):
-            self.g.remove_node(agent.id)
+        self._invalidate_agents([agent])
+        self._storage.remove_agent(agent.id)
+        self._unindex_agents([agent])
 
     def remove_agents(self, agents: list) -> None:
         """Remove multiple agents from the environment at once.
 
+        All affected memberships are deleted in one pass.
+
         Args:
             agents (list): An iterable over multiple agents.
         """
-        for agent in agents:
-            self.remove_agent(agent)
+        agents = list(agents)
+        self._invalidate_agents(agents)
+        self._storage.remove_agents([agent.id for agent in agents])
+        self._unindex_agents(agents)
 
     def remove_location(self, location: _location.Location) -> None:
         """Remove a location from the environment.
@@ -199,17 +395,27 @@ class Model(ap.Model):
         Args:
             location: Location to be removed.
         """
-        if self.g.has_node(location.id):
-            self.g.remove_node(location.id)
+        self._invalidate_neighbors([location])
+        self._unindex_locations([location])
+        self._storage.remove_location(location.id)
+        self._weight_registry.pop(location.id, None)
+        self._unchecked_locations.pop(location.id, None)
 
     def remove_locations(self, locations: list) -> None:
         """Remove multiple locations at once.
 
+        All affected memberships are deleted in one pass.
+
         Args:
             locations (list): An iterable over locations.
         """
+        locations = list(locations)
+        self._invalidate_neighbors(locations)
+        self._unindex_locations(locations)
+        self._storage.remove_locations([location.id for location in locations])
         for location in locations:
-            self.remove_location(location)
+            self._weight_registry.pop(location.id, None)
+            self._unchecked_locations.pop(location.id, None)
 
     def remove_agent_from_location(
         self,
@@ -227,15 +433,208 @@ class Model(ap.Model):
             Exception: Raised if the agent does not exist in the environment.
         """
         # TODO: use custom exceptions
-        if not self.g.has_node(location.id):
+        if not self._storage.has_location(location.id):
             msg = f"Location {location} does not exist in Environment!"
             raise Exception(msg)
-        if not self.g.has_node(agent.id):
+        if not self._storage.has_agent(agent.id):
             msg = f"Agent {agent} does not exist in Environment!"
             raise Exception(msg)
 
-        if self.g.has_edge(agent.id, location.id):
-            self.g.remove_edge(agent.id, location.id)
+        self._invalidate_neighbors([location])
+        self._storage.remove_membership(agent.id, location.id)
+        self._unindex_memberships([agent.id], [location])
+
+    def remove_memberships(
+        self,
+        location_ids: typing.Iterable[int],
+        agent_ids: typing.Iterable[int],
+    ) -> None:
+        """Remove many agents from locations at once.
+
+        The i-th agent is removed from the i-th location. All ids are validated once and all
+        memberships are deleted in one pass. Pairs that are not connected are ignored.
+
+        Args:
+            location_ids: The ids of the locations.
+            agent_ids: The ids of the agents, one for each location id.
+
+        Raises:
+            Exception: Raised if the numbers of ids do not match.
+            Exception: Raised if a location does not exist in the environment.
+            Exception: Raised if an agent does not exist in the environment.
+        """
+        location_ids = list(location_ids)
+        agent_ids = list(agent_ids)
+
+        if len(location_ids) != len(agent_ids):
+            msg = "`location_ids` and `agent_ids` must have the same length."
+            raise Exception(msg)
+
+        self._check_ids(location_ids=location_ids, agent_ids=agent_ids)
+        locations = self._locations_of_ids(location_ids)
+        self._invalidate_neighbors(locations)
+        self._storage.remove_memberships(agent_ids, location_ids)
+        self._unindex_memberships(agent_ids, locations)
+
+    def _check_ids(self, location_ids: list[int], agent_ids: list[int]) -> None:
+        for location_id in set(location_ids):
+            if not self._storage.has_location(location_id):
+                msg = f"Location with id {location_id} does not exist in Environment!"
+                raise Exception(msg)
+        for agent_id in set(agent_ids):
+            if not self._storage.has_agent(agent_id):
+                msg = f"Agent with id {agent_id} does not exist in Environment!"
+                raise Exception(msg)
+
+    def _locations_of_ids(self, location_ids: list[int]) -> list:
+        # the networkx storage shares one id namespace, so an id can be known as an agent only
+        locations = self._storage.locations
+        return [locations.get(location_id) for location_id in location_ids]
+
+    def _index_memberships(self, agent_ids: list[int], locations: list) -> None:
+        index = self._agent_location_types
+        for agent_id, location in zip(agent_ids, locations):
+            if location is not None:
+                memberships = index.setdefault(agent_id, {})
+                memberships.setdefault(type(location), {})[location.id] = location
+
+    def _unindex_memberships(self, agent_ids: list[int], locations: list) -> None:
+        index = self._agent_location_types
+        for agent_id, location in zip(agent_ids, locations):
+            if location is not None and agent_id in index:
+                index[agent_id].get(type(location), {}).pop(location.id, None)
+
+    def _unindex_agents(self, agents: list) -> None:
+        for agent in agents:
+            self._agent_types.get(type(agent), {}).pop(agent.id, None)
+            self._agent_location_types.pop(agent.id, None)
+
+    def _unindex_locations(self, locations: list) -> None:
+        # has to run before the locations are removed from the storage
+        for location in locations:
+            if location.id not in self._location_types.get(type(location), {}):
+                continue
+            del self._location_types[type(location)][location.id]
+            for agent in self._storage.agents_of_location(location.id):
+                memberships = self._agent_location_types.get(agent.id, {})
+                memberships.get(type(location), {}).pop(location.id, None)
+
+    def _invalidate_neighbors(self, locations: list) -> None:
+        # has to run while the affected agents are still members of the locations
+        if not self._neighbor_cache:
+            return
+
+        unique_locations = {location.id: location for location in locations if location is not None}
+        for location in unique_locations.values():
+            if not self._storage.has_location(location.id):
+                continue
+            name = type(location).__name__
+            for agent in self._storage.agents_of_location(location.id):
+                entries = self._neighbor_cache.get(agent.id)
+                if entries:
+                    for key in [key for key in entries if key is None or name in key]:
+                        del entries[key]
+
+    def _invalidate_agents(self, agents: list) -> None:
+        if not self._neighbor_cache:
+            return
+
+        for agent in agents:
+            memberships = self._agent_location_types.get(agent.id, {})
+            self._invalidate_neighbors(
+                [location for locations in memberships.values() for location in locations.values()],
+            )
+            self._neighbor_cache.pop(agent.id, None)
+
+    def neighbor_cache_info(self) -> dict:
+        """Return statistics of the neighbor cache.
+
+        See :attr:`cache_neighbors`.
+
+        Returns:
+            dict: The number of cache hits, cache misses and currently cached entries.
+        """
+        return {
+            "hits": self._neighbor_cache_hits,
+            "misses": self._neighbor_cache_misses,
+            "entries": sum(len(entries) for entries in self._neighbor_cache.values()),
+        }
+
+    def clear_neighbor_cache(self) -> None:
+        """Drop all cached neighbors and reset the statistics of the neighbor cache."""
+        self._neighbor_cache.clear()
+        self._neighbor_cache_hits = 0
+        self._neighbor_cache_misses = 0
+
+    def _types_of(
+        self,
+        index: dict,
+        classes: list,
+        include_subclasses: bool = False,
+    ) -> list[type]:
+        if len(classes) < 1:
+            msg = "The list of classes must not be empty. Use `None` to disable the filter."
+            raise Exception(msg)
+
+        names = {cls if isinstance(cls, str) else utils._get_cls_as_str(cls) for cls in classes}
+        if include_subclasses:
+            return [cls for cls in index if any(base.__name__ in names for base in cls.__mro__)]
+        return [cls for cls in index if cls.__name__ in names]
+
+    @staticmethod
+    def _objects_of_types(index: dict, types: list[type]) -> list:
+        if len(types) == 1:
+            return list(index[types[0]].values())
+        return sorted(
+            (obj for cls in types for obj in index[cls].values()),
+            key=lambda obj: obj.id,
+        )
+
+    def agents_of_type(
+        self,
+        agent_classes: type | str | list,
+        include_subclasses: bool = False,
+    ) -> AgentList:
+        """Return all agents of the given classes.
+
+        The agents are looked up in an index of the model's agents by class, so this does not
+        scan all agents.
+
+        Args:
+            agent_classes: An agent class, the name of an agent class or a list of both.
+            include_subclasses: Whether instances of subclasses are returned as well. Defaults to
+                False.
+
+        Returns:
+            AgentList: The agents of the given classes.
+        """
+        if not isinstance(agent_classes, list):
+            agent_classes = [agent_classes]
+        types = self._types_of(self._agent_types, agent_classes, include_subclasses)
+        return AgentList(self.model, self._objects_of_types(self._agent_types, types))
+
+    def locations_of_type(
+        self,
+        location_classes: type | str | list,
+        include_subclasses: bool = False,
+    ) -> LocationList:
+        """Return all locations of the given classes.
+
+        The locations are looked up in an index of the model's locations by class, so this does
+        not scan all locations.
+
+        Args:
+            location_classes: A location class, the name of a location class or a list of both.
+            include_subclasses: Whether instances of subclasses are returned as well. Defaults to
+                False.
+
+        Returns:
+            LocationList: The locations of the given classes.
+        """
+        if not isinstance(location_classes, list):
+            location_classes = [location_classes]
+        types = self._types_of(self._location_types, location_classes, include_subclasses)
+        return LocationList(self.model, self._objects_of_types(self._location_types, types))
 
     def agents_of_location(self, location: _location.Location) -> AgentList:
         """Return the list of agents associated with a specific location.
@@ -246,26 +645,35 @@ class Model(ap.Model):
         Returns:
             A list of agents.
         """
-        nodes = self.g.neighbors(location.id)
-        return AgentList(
-            self.model,
-            (self.g.nodes[node]["_obj"] for node in nodes if self.g.nodes[node]["bipartite"] == 0),
-        )
+        return AgentList(self.model, self._storage.agents_of_location(location.id))
 
-    def locations_of_agent(self, agent: _agent.Agent) -> LocationList:
+    def locations_of_agent(
+        self,
+        agent: _agent.Agent,
+        location_classes: list | None = None,
+    ) -> LocationList:
         """Return the list of locations associated with a specific agent.
 
+        The locations to be considered can be defined with location_classes.
+
         Args:
             agent: The desired agent.
+            location_classes: A list of location classes. Defaults to None.
 
         Returns:
             A list of locations.
         """
-        nodes = self.g.neighbors(agent.id)
-        return LocationList(
-            self.model,
-            (self.g.nodes[node]["_obj"] for node in nodes if self.g.nodes[node]["bipartite"] == 1),
-        )
+        if location_classes is None:
+            return LocationList(self.model, self._storage.locations_of_agent(agent.id))
+        locations = self._typed_locations_of_agent(agent, location_classes)
+        return LocationList(self.model, locations.values())
+
+    def _typed_locations_of_agent(self, agent: _agent.Agent, location_classes: list) -> dict:
+        memberships = self._agent_location_types.get(agent.id, {})
+        types = self._types_of(memberships, location_classes)
+        if len(types) == 1:
+            return memberships[types[0]]
+        return {location.id: location for cls in types for location in memberships[cls].values()}
 
     def neighbors_of_agent(
         self,
@@ -274,7 +682,9 @@ class Model(ap.Model):
     ) -> AgentList:
         """Return a list of neighboring agents for a specific agent.
 
-        The locations to be considered can be defined with location_classes.
+        The locations to be considered can be defined with location_classes. If
+        :attr:`cache_neighbors` is set, the neighbors are computed once and reused until the
+        memberships of the agent or of its neighbors change.
 
         Args:
             agent: Agent of whom the neighbors are to be returned.
@@ -283,68 +693,45 @@ class Model(ap.Model):
         Returns:
             The list of neighbors for the specified agent.
         """
+        if not self.cache_neighbors:
+            return AgentList(self.model, self._neighbors_of_agent(agent, location_classes))
+
+        key = None
         if location_classes:
-            location_classes = [
-                (utils._get_cls_as_str(cls) if not isinstance(cls, str) else cls)
+            key = frozenset(
+                cls if isinstance(cls, str) else utils._get_cls_as_str(cls)
                 for cls in location_classes
-            ]
-
-            locations = (
-                node
-                for node in self.g.neighbors(agent.id)
-                if self.g.nodes[node]["bipartite"] == 1
-                and self.g.nodes[node]["_obj"].type in location_classes
             )
+
+        entries = self._neighbor_cache.setdefault(agent.id, {})
+        if key in entries:
+            self._neighbor_cache_hits += 1
         else:
-            locations = (
-                node for node in self.g.neighbors(agent.id) if self.g.nodes[node]["bipartite"] == 1
-            )
+            self._neighbor_cache_misses += 1
+            entries[key] = self._neighbors_of_agent(agent, location_classes)
+        return AgentList(self.model, entries[key])
 
-        neighbor_agents = {
-            agent_id
-            for location_id in locations
-            for agent_id in self.g.neighbors(location_id)
-            if self.g.nodes[agent_id]["bipartite"] == 0
-        }
-        return AgentList(
-            self.model,
-            (
-                self.g.nodes[agent_id]["_obj"]
-                for agent_id in neighbor_agents
-                if agent_id != agent.id
-            ),
-        )
+    def _neighbors_of_agent(self, agent: _agent.Agent, location_classes: list | None) -> list:
+        if location_classes:
+            location_ids = self._typed_locations_of_agent(agent, location_classes)
+        else:
+            location_ids = (location.id for location in self._storage.locations_of_agent(agent.id))
 
-    # TODO: evlt. filtern nach Klasse oder Key einbauen
-    def _objects_between_objects(self, object1, object2, object_classes: list | None = None):
-        paths = list(
-            nx.all_simple_paths(
-                G=self.g,
-                source=object1.id,
-                target=object2.id,
-                cutoff=2,
-            ),
-        )
+        neighbor_agents = self._storage.agents_of_locations(location_ids)
+        return [agent_v for agent_v in neighbor_agents if agent_v.id != agent.id]
 
-        objects_between = [self.g.nodes[path[1]]["_obj"] for path in paths]
+    def _filter_by_classes(self, objects: list, index: dict, object_classes: list | None) -> list:
+        if object_classes is None:
+            return objects
 
-        if object_classes is not None:
-            if len(object_classes) < 1:
-                # TODO
-                raise Exception
-
-            object_classes = [
-                (utils._get_cls_as_str(cls) if not isinstance(cls, str) else cls)
-                for cls in object_classes
-            ]
-            filtered_objects_between = [o for o in objects_between if o.type in object_classes]
-            return filtered_objects_between
-        else:
-            return objects_between
+        types = set(self._types_of(index, object_classes))
+        return [o for o in objects if type(o) in types]
 
     def locations_between_agents(self, agent1, agent2, location_classes: list | None = None):
         """Return all locations the connect two agents.
 
+        The shared locations are found by intersecting the memberships of both agents.
+
         Args:
             agent1 (Agent): Agent 1.
             agent2 (Agent): Agent 2.
@@ -354,14 +741,23 @@ class Model(ap.Model):
         Returns:
             LocationList: A list of locations.
         """
-        return LocationList(
-            model=self.model,
-            objs=self._objects_between_objects(agent1, agent2, location_classes),
-        )
+        if location_classes is None:
+            locations = self._storage.locations_between_agents(agent1.id, agent2.id)
+        else:
+            locations1 = self._typed_locations_of_agent(agent1, location_classes)
+            locations2 = self._typed_locations_of_agent(agent2, location_classes)
+            locations = [
+                location
+                for location_id, location in locations1.items()
+                if location_id in locations2
+            ]
+        return LocationList(model=self.model, objs=locations)
 
     def agents_between_locations(self, location1, location2, agent_classes: list | None = None):
         """Return all agents between two locations.
 
+        The shared agents are found by intersecting the memberships of both locations.
+
         Args:
             location1 (Location): Location 1.
             location2 (Location): Location 2.
@@ -371,9 +767,10 @@ class Model(ap.Model):
         Returns:
             AgentList: A list of agents.
         """
+        agents = self._storage.agents_between_locations(location1.id, location2.id)
         return AgentList(
             model=self.model,
-            objs=self._objects_between_objects(location1, location2, agent_classes),
+            objs=self._filter_by_classes(agents, self._agent_types, agent_classes),
         )
 
     def set_weight(self, agent, location, weight) -> None:
@@ -384,7 +781,19 @@ class Model(ap.Model):
             location (Location): The location.
             weight (int): The weight
         """
-        self.g[agent.id][location.id]["weight"] = 1 if weight is None else weight
+        self._storage.set_weight(agent.id, location.id, 1 if weight is None else weight)
+
+    def set_location_weights(self, location, weights: typing.Iterable[float | None]) -> None:
+        """Set the weights of all agents at a location at once.
+
+        Args:
+            location (Location): The location.
+            weights: One weight for each agent, in the order of :attr:`Location.agents`. A weight
+                of None is stored as 1.
+        """
+        if not isinstance(weights, np.ndarray):
+            weights = [1 if weight is None else weight for weight in weights]
+        self._storage.set_location_weights(location.id, weights)
 
     def get_weight(self, agent, location) -> int:
         """Get the weight of an agent at a location.
@@ -396,7 +805,7 @@ class Model(ap.Model):
         Returns:
             int: The weight.
         """
-        return self.g[agent.id][location.id]["weight"]
+        return self._storage.get_weight(agent.id, location.id)
 
     def connect_agents(self, agents: list, location_cls: type):
         """Connects multiple agents via an instance of a given location class.
@@ -493,36 +902,255 @@ class Model(ap.Model):
         self,
         node_attrs: list | None = None,
         include_0_weights: bool = True,
-    ) -> nx.Graph:
+        projection: str | None = None,
+        return_sparse: bool = False,
+    ) -> nx.Graph | sp.csr_matrix:
         """Creates a projection of the model's bipartite network.
 
+        The projection is computed from the sparse agent x location incidence matrix in a few
+        sparse matrix operations instead of looking at each pair of agents separately.
+
         Args:
             node_attrs: A list of agent attributes
             include_0_weights: Should edges with weight 0 be displayed?
+            projection: How the weights of two agents at a shared location are combined.
+                If None, each location's :meth:`~pop2net.Location.project_weights_batch` (or its
+                :meth:`~pop2net.Location.project_weights`, if only that one is overwritten) is
+                used, which takes the minimum of both weights by default. "min", "product" and
+                "sum" apply the respective rule to all locations. The combined weights are summed
+                over all shared locations. The minimum is computed from the distinct weights of all
+                memberships at once, so it matches `min()` only up to floating-point precision,
+                unless all weights are integers. Defaults to None.
+            return_sparse: Should the weighted adjacency matrix be returned as
+                :class:`scipy.sparse.csr_matrix` instead of a graph? Its rows and columns follow the
+                order of :attr:`agents`. Defaults to False.
 
         Returns:
             A weighted graph created from a model's agent list. Agents are connected if they are
             neighbors in the model. Their connecting edge include the contact_weight as "weight"
-            attribute.
+            attribute. If all weights are integers and no location combines them in its own way,
+            so are the edge weights of the graph.
         """
-        graph = nx.Graph()
+        if projection is not None and projection not in _PROJECTIONS:
+            msg = f"`projection` must be None or one of {_PROJECTIONS}, not {projection!r}."
+            raise Exception(msg)
+
+        agents = list(self._storage.agents.values())
+        locations = list(self._storage.locations.values())
+
+        incidence = self._storage.incidence_matrix()
+        structure = incidence.copy()
+        structure.data[:] = 1
+
+        # all pairs of agents that share at least one location
+        pairs = sp.triu(structure @ structure.T, k=1).tocoo()
+
+        integral = _is_integral(incidence.data)
+        if projection is not None:
+            matrix = _project(incidence, projection)
+        else:
+            from pop2net.location import Location
+
+            # sort the locations by how they combine weights
+            batch, custom = [], []
+            for j, location in enumerate(locations):
+                location_cls = type(location)
+                if location_cls.project_weights_batch is not Location.project_weights_batch:
+                    batch.append(j)
+                elif location_cls.project_weights is not Location.project_weights:
+                    custom.append(j)
+
+            if not batch and not custom:
+                matrix = _project(incidence, "min")
+            else:
+                integral = False
+                default = np.setdiff1d(np.arange(len(locations)), batch + custom)
+                matrix = (
+                    _project(incidence[:, default], "min")
+                    + _project_pairwise(
+                        incidence.tocsc(),
+                        columns=batch,
+                        functions=[locations[j].project_weights_batch for j in batch],
+                    )
+                    + _project_custom(
+                        incidence.tocsc(),
+                        agents=agents,
+                        locations=locations,
+                        columns=custom,
+                    )
+                )
+
+        weights = (
+            np.asarray(matrix.tocsr()[pairs.row, pairs.col]).ravel()
+            if pairs.nnz > 0
+            else np.empty(0)
+        )
+        keep = np.ones(len(weights), dtype=bool) if include_0_weights else weights > 0
+        rows, cols, weights = pairs.row[keep], pairs.col[keep], weights[keep]
+
+        if return_sparse:
+            return sp.csr_matrix(
+                (
+                    np.concatenate([weights, weights]),
+                    (np.concatenate([rows, cols]), np.concatenate([cols, rows])),
+                ),
+                shape=(len(agents), len(agents)),
+            )
+
+        # the built-in rules combine integer weights to integers, which are exact in float64
+        if integral:
+            weights = weights.astype(np.int64)
 
-        # create nodes
-        for agent in self.agents:
-            if not graph.has_node(agent.id):
-                node_attr_dict = (
-                    {node_attr: vars(agent)[node_attr] for node_attr in node_attrs}
+        graph = nx.Graph()
+        graph.add_nodes_from(
+            (
+                agent.id,
+                (
+                    {node_attr: utils._get_vars(agent)[node_attr] for node_attr in node_attrs}
                     if node_attrs is not None
                     else {}
-                )
-                graph.add_node(agent.id, **node_attr_dict)
+                ),
+            )
+            for agent in agents
+        )
 
-        # create edges
-        for agent in self.agents:
-            for agent_v in agent.neighbors():
-                if not graph.has_edge(agent.id, agent_v.id):
-                    weight = agent.get_agent_weight(agent_v)
-                    if include_0_weights or weight > 0:
-                        graph.add_edge(agent.id, agent_v.id, weight=weight)
+        agent_ids = np.array([agent.id for agent in agents])
+        graph.add_edges_from(
+            (u, v, {"weight": weight})
+            for u, v, weight in zip(
+                agent_ids[rows].tolist(),
+                agent_ids[cols].tolist(),
+                weights.tolist(),
+            )
+        )
 
         return graph
+
+
+_PROJECTIONS = ("min", "product", "sum")
+
+# above this number of distinct weights, "min" is computed pair by pair within each location
+_MAX_MIN_THRESHOLDS = 32
+
+
+def _is_integral(values: np.ndarray) -> bool:
+    return bool(np.all(np.isfinite(values)) and np.all(values == np.trunc(values)))
+
+
+def _project(incidence: sp.csr_matrix, projection: str) -> sp.csr_matrix:
+    """Project a weighted agent x location incidence matrix onto the agents.
+
+    "min" is computed from the distinct weights as thresholds, which sums their differences. It
+    is therefore exact for integer weights, but may deviate from `min()` by a rounding error
+    otherwise.
+
+    Args:
+        incidence: The weighted agent x location incidence matrix.
+        projection: One of "min", "product" and "sum".
+
+    Returns:
+        sp.csr_matrix: A symmetric agent x agent matrix of summed combined weights. The diagonal
+            is meaningless.
+    """
+    structure = incidence.copy()
+    structure.data[:] = 1
+
+    if projection == "product":
+        return incidence @ incidence.T
+
+    if projection == "sum":
+        return incidence @ structure.T + structure @ incidence.T
+
+    thresholds = np.unique(incidence.data)
+    if len(thresholds) > _MAX_MIN_THRESHOLDS:
+        return _project_pairwise(
+            incidence.tocsc(),
+            columns=range(incidence.shape[1]),
+            functions=itertools.repeat(np.minimum),
+        )
+
+    # For the distinct weights t_1 < ... < t_k of all memberships:
+    # min(a, b) = t_1 + sum over i > 1 of (t_i - t_(i-1)) * [a >= t_i] * [b >= t_i]
+    matrix = structure @ structure.T
+    if len(thresholds) == 0:
+        return matrix
+
+    matrix = matrix * thresholds[0]
+    for lower, upper in zip(thresholds[:-1], thresholds[1:]):
+        above = incidence.copy()
+        above.data = (incidence.data >= upper).astype(np.float64)
+        above.eliminate_zeros()
+        matrix = matrix + (upper - lower) * (above @ above.T)
+
+    return matrix
+
+
+def _project_pairwise(
+    incidence: sp.csc_matrix,
+    columns: typing.Iterable[int],
+    functions: typing.Iterable[typing.Callable],
+) -> sp.csr_matrix:
+    """Combine the weights of all pairs of agents within each location with a vectorized function.
+
+    Args:
+        incidence: The weighted agent x location incidence matrix.
+        columns: The locations to be considered.
+        functions: For each location, a function that combines two arrays of weights
+            element-wise.
+
+    Returns:
+        sp.csr_matrix: A symmetric agent x agent matrix of summed combined weights.
+    """
+    rows, cols, data = [], [], []
+    for j, function in zip(columns, functions):
+        start, end = incidence.indptr[j], incidence.indptr[j + 1]
+        members = incidence.indices[start:end]
+        weights = incidence.data[start:end]
+        u, v = np.triu_indices(len(members), k=1)
+        rows.append(members[u])
+        cols.append(members[v])
+        data.append(function(weights[u], weights[v]))
+
+    return _symmetric_matrix(rows, cols, data, n=incidence.shape[0])
+
+
+def _project_custom(
+    incidence: sp.csc_matrix,
+    agents: list,
+    locations: list,
+    columns: list[int],
+) -> sp.csr_matrix:
+    """Combine the weights of all pairs of agents with the locations' own `project_weights`.
+
+    Args:
+        incidence: The weighted agent x location incidence matrix.
+        agents: The agents in the order of the rows of `incidence`.
+        locations: The locations in the order of the columns of `incidence`.
+        columns: The locations to be considered.
+
+    Returns:
+        sp.csr_matrix: A symmetric agent x agent matrix of summed combined weights.
+    """
+    rows, cols, data = [], [], []
+    for j in columns:
+        location = locations[j]
+        members = incidence.indices[incidence.indptr[j] : incidence.indptr[j + 1]].tolist()
+        for u, v in itertools.combinations(members, 2):
+            rows.append([u])
+            cols.append([v])
+            data.append([location.project_weights(agent1=agents[u], agent2=agents[v])])
+
+    return _symmetric_matrix(rows, cols, data, n=incidence.shape[0])
+
+
+def _symmetric_matrix(rows: list, cols: list, data: list, n: int) -> sp.csr_matrix:
+    if not rows:
+        return sp.csr_matrix((n, n))
+    rows, cols, data = np.concatenate(rows), np.concatenate(cols), np.concatenate(data)
+    return sp.csr_matrix(
+        (
+            np.concatenate([data, data]).astype(np.float64),
+            (np.concatenate([rows, cols]), np.concatenate([cols, rows])),
+        ),
+        shape=(n, n),
+    )
@@ -1,10 +1,14 @@
 """Helper to sample from a dataframe."""
 
+from collections.abc import Iterator
 from typing import Optional
+from typing import Union
 
 import numpy as np
 import pandas as pd
 
+import pop2net.utils as utils
+
 
 class DataReader:
     """Helper to sample from a dataframe."""
@@ -27,64 +31,136 @@ class DataReader:
 
         self.df = df
 
+        # the rows of each group and the alias tables of the group weights, built on first use
+        self._indexed_df: Optional[pd.DataFrame] = None
+        self._groups: dict = {}
+        self._alias_tables: dict = {}
+
     def sample(
         self,
         by: str,
         size: int,
         weights: Optional[str] = None,
         with_replacement: bool = True,
-    ) -> pd.DataFrame:
-        """_summary_.
+        chunksize: Optional[int] = None,
+    ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """Draw a sample of rows by groups of rows.
+
+        Groups are the rows with the same value in the column `by`. With replacement, whole groups
+        are drawn until the sample has `size` rows, and the last group is cut off. Without
+        replacement, the sample consists of the first `size` rows of the drawn groups.
+
+        The rows of each group are indexed on the first sample by a column, and so are the weights
+        of the groups, so that further samples take time in proportion to their size only.
 
         Args:
-            by (str): _description_
-            size (int): _description_
-            weights (Optional[str], optional): _description_. Defaults to None.
-            with_replacement (bool, optional): _description_. Defaults to True.
+            by (str): The column that defines the groups.
+            size (int): The number of rows to be sampled.
+            weights (Optional[str], optional): A column with the weight of each group, which is
+                taken from its first row. Defaults to None.
+            with_replacement (bool, optional): Whether groups are drawn with replacement.
+                Defaults to True.
+            chunksize (Optional[int], optional): If given, an iterator over the sample in
+                DataFrames of at most `chunksize` rows is returned, so that large samples do not
+                have to be held in memory at once. Defaults to None.
 
         Raises:
-            ValueError: _description_
+            ValueError: If `size` is larger than the dataset and the sample is drawn without
+                replacement.
 
         Returns:
-            pd.DataFrame: _description_
+            Union[pd.DataFrame, Iterator[pd.DataFrame]]: The sampled rows.
         """
-        if weights is None:
-            unique_by = self.df[[by]].drop_duplicates(subset=by, keep="first")
-            weight_col = None
-        else:
-            unique_by = self.df[[by, weights]].drop_duplicates(subset=by, keep="first")
-            weight_col = unique_by[weights]
+        order, starts, lengths = self._get_groups(by)
+        n_groups = len(lengths)
+
+        if with_replacement:
+            if weights is None:
+                sample = self.rng.integers(n_groups, size=size)
+            else:
+                prob, alias = self._get_alias_table(by, weights)
+                sample = self.rng.integers(n_groups, size=size)
+                sample = np.where(self.rng.random(size) < prob[sample], sample, alias[sample])
+
+            # keep the groups up to the first one with which the sample reaches its size
+            n_sample = np.searchsorted(np.cumsum(lengths[sample]), size) + 1
+            positions = utils._gather_groups(order, starts, lengths, sample[:n_sample])[:size]
+
+        elif size <= n_groups:
+            p = None if weights is None else self._get_weights(by, weights)
+            sample = self.rng.choice(n_groups, p=p, replace=False, size=size)
+
+            # the rows of the sampled groups in the order of the dataset
+            in_sample = np.zeros(len(self.df), dtype=bool)
+            in_sample[utils._gather_groups(order, starts, lengths, sample)] = True
+            positions = np.flatnonzero(in_sample)[:size]
 
-        id_col = unique_by[by]
-        if with_replacement or (size <= len(id_col)):
-            sample = self.rng.choice(id_col, p=weight_col, replace=with_replacement, size=size)
         elif size <= len(self.df):
             # edge case:
             # sampling without replacement and non-unique sampling column while size
             # is larger than number of unique values to sample from
-            sample = id_col.tolist()  # type: ignore
-            self.rng.shuffle(sample)
+            positions = np.arange(size)
+
         else:
             msg = f"Cannot sample size ({size}) larger than dataset ({len(self.df)}) without replacement!"  # noqa: E501
             raise ValueError(msg)
 
-        if not with_replacement:
-            # Faster shortcut that is possible if sampling is done without replacement.
-            # Therefore implemented separately.
-            df = self.df.loc[self.df[by].isin(sample), :]
-            df = df.iloc[:size]
-        else:
-            subset_dfs = []
-            len_counter = 0
-            for sample_id in sample:
-                subset = self.df[self.df[by] == sample_id]
-                subset_dfs.append(subset)
-
-                len_counter += len(subset)
-                if len_counter >= size:
-                    break
-
-            df = pd.concat(subset_dfs, axis=0)
-            df = df.iloc[:size]
-
-        return df
+        if chunksize is not None:
+            return (
+                self.df.iloc[positions[start : start + chunksize]]
+                for start in range(0, len(positions), chunksize)
+            )
+
+        return self.df.iloc[positions]
+
+    def _get_groups(self, by: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._indexed_df is not self.df:
+            self._indexed_df = self.df
+            self._groups = {}
+            self._alias_tables = {}
+
+        if by not in self._groups:
+            self._groups[by] = utils._group_offsets(self.df[by])
+        return self._groups[by]
+
+    def _get_weights(self, by: str, weights: str) -> np.ndarray:
+        order, starts, _ = self._get_groups(by)
+        group_weights = self.df[weights].to_numpy(dtype=float)[order[starts]]
+        return group_weights / group_weights.sum()
+
+    def _get_alias_table(self, by: str, weights: str) -> tuple[np.ndarray, np.ndarray]:
+        if (by, weights) not in self._alias_tables:
+            self._alias_tables[(by, weights)] = _alias_table(self._get_weights(by, weights))
+        return self._alias_tables[(by, weights)]
+
+
+def _alias_table(p: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Build the table of Walker's alias method to draw from a discrete distribution in O(1).
+
+    To draw, pick an index `i` uniformly and keep it with probability `prob[i]`, otherwise take
+    `alias[i]`.
+
+    Args:
+        p: The probability of each index.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: The probabilities `prob` and the indices `alias`.
+    """
+    n = len(p)
+    prob = (p * n).tolist()
+    alias = list(range(n))
+    small = [i for i, value in enumerate(prob) if value < 1]
+    large = [i for i, value in enumerate(prob) if value >= 1]
+
+    while small and large:
+        i = small.pop()
+        j = large.pop()
+        alias[i] = j
+        prob[j] += prob[i] - 1
+        (small if prob[j] < 1 else large).append(j)
+
+    # the rest is 1 except for rounding errors
+    for i in small + large:
+        prob[i] = 1.0
+
+    return np.array(prob), np.array(alias, dtype=np.int64)
@@ -0,0 +1,869 @@
+"""Storage backends that hold a model's agents, locations and their memberships."""
+
+from __future__ import annotations
+
+import typing
+
+import networkx as nx
+import numpy as np
+import scipy.sparse as sp
+
+if typing.TYPE_CHECKING:
+    from . import agent as _agent
+    from . import location as _location
+
+
+class Storage:
+    """Base class for the containers that store the bipartite network of a model.
+
+    A storage keeps track of the agents and locations of a model and of the memberships
+    (weighted edges) between them. :class:`pop2net.Model` only talks to its storage through
+    the methods defined here, so a different backend can be plugged in by setting
+    :attr:`pop2net.Model.storage_class`.
+
+    Attributes:
+        agents (dict): The stored agents by their id, in the order they were added.
+            It is kept up to date by the storage and must not be changed from outside.
+        locations (dict): The stored locations by their id, in the order they were added.
+            It is kept up to date by the storage and must not be changed from outside.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty storage."""
+        self.agents: dict[int, _agent.Agent] = {}
+        self.locations: dict[int, _location.Location] = {}
+
+    def add_agent(self, agent: _agent.Agent) -> None:
+        """Add an agent. Does nothing if the agent is already stored.
+
+        Args:
+            agent: The agent.
+        """
+        raise NotImplementedError
+
+    def add_location(self, location: _location.Location) -> None:
+        """Add a location. Does nothing if the location is already stored.
+
+        Args:
+            location: The location.
+        """
+        raise NotImplementedError
+
+    def remove_agent(self, agent_id: int) -> None:
+        """Remove an agent and all of its memberships.
+
+        Args:
+            agent_id: The id of the agent.
+        """
+        raise NotImplementedError
+
+    def remove_location(self, location_id: int) -> None:
+        """Remove a location and all of its memberships.
+
+        Args:
+            location_id: The id of the location.
+        """
+        raise NotImplementedError
+
+    def remove_agents(self, agent_ids: list[int]) -> None:
+        """Remove many agents and all of their memberships at once. Unknown ids are ignored.
+
+        Args:
+            agent_ids: The ids of the agents.
+        """
+        for agent_id in agent_ids:
+            self.remove_agent(agent_id)
+
+    def remove_locations(self, location_ids: list[int]) -> None:
+        """Remove many locations and all of their memberships at once. Unknown ids are ignored.
+
+        Args:
+            location_ids: The ids of the locations.
+        """
+        for location_id in location_ids:
+            self.remove_location(location_id)
+
+    def has_agent(self, agent_id: int) -> bool:
+        """Check whether an agent is stored.
+
+        Args:
+            agent_id: The id of the agent.
+
+        Returns:
+            bool: True if the agent is stored.
+        """
+        raise NotImplementedError
+
+    def has_location(self, location_id: int) -> bool:
+        """Check whether a location is stored.
+
+        Args:
+            location_id: The id of the location.
+
+        Returns:
+            bool: True if the location is stored.
+        """
+        raise NotImplementedError
+
+    def add_membership(self, agent_id: int, location_id: int, weight: float, **kwargs) -> None:
+        """Connect an agent with a location.
+
+        If the membership already exists, its weight and attributes are updated.
+
+        Args:
+            agent_id: The id of the agent.
+            location_id: The id of the location.
+            weight: The weight of the membership.
+            **kwargs: Additional edge attributes.
+        """
+        raise NotImplementedError
+
+    def add_memberships(
+        self,
+        agent_ids: list[int],
+        location_ids: list[int],
+        weights: list[float],
+        **kwargs,
+    ) -> None:
+        """Connect many agents with locations at once.
+
+        The i-th agent is connected with the i-th location. Existing memberships are updated.
+
+        Args:
+            agent_ids: The ids of the agents.
+            location_ids: The ids of the locations.
+            weights: The weight of each membership.
+            **kwargs: Additional edge attributes that are set for all memberships.
+        """
+        for agent_id, location_id, weight in zip(agent_ids, location_ids, weights):
+            self.add_membership(agent_id, location_id, weight, **kwargs)
+
+    def remove_membership(self, agent_id: int, location_id: int) -> None:
+        """Disconnect an agent from a location. Does nothing if they are not connected.
+
+        Args:
+            agent_id: The id of the agent.
+            location_id: The id of the location.
+        """
+        raise NotImplementedError
+
+    def remove_memberships(self, agent_ids: list[int], location_ids: list[int]) -> None:
+        """Disconnect many agents from locations at once.
+
+        The i-th agent is disconnected from the i-th location. Pairs that are not connected are
+        ignored.
+
+        Args:
+            agent_ids: The ids of the agents.
+            location_ids: The ids of the locations.
+        """
+        for agent_id, location_id in zip(agent_ids, location_ids):
+            self.remove_membership(agent_id, location_id)
+
+    def has_membership(self, agent_id: int, location_id: int) -> bool:
+        """Check whether an agent is connected with a location.
+
+        Args:
+            agent_id: The id of the agent.
+            location_id: The id of the location.
+
+        Returns:
+            bool: True if the agent is connected with the location.
+        """
+        raise NotImplementedError
+
+    def set_weight(self, agent_id: int, location_id: int, weight: float) -> None:
+        """Set the weight of an existing membership.
+
+        Args:
+            agent_id: The id of the agent.
+            location_id: The id of the location.
+            weight: The weight.
+        """
+        raise NotImplementedError
+
+    def set_location_weights(self, location_id: int, weights: typing.Iterable[float]) -> None:
+        """Set the weights of all memberships of a location at once.
+
+        Args:
+            location_id: The id of the location.
+            weights: One weight for each agent, in the order of :meth:`agents_of_location`.
+        """
+        for agent, weight in zip(self.agents_of_location(location_id), weights):
+            self.set_weight(agent.id, location_id, weight)
+
+    def get_weight(self, agent_id: int, location_id: int) -> float:
+        """Return the weight of an existing membership.
+
+        Args:
+            agent_id: The id of the agent.
+            location_id: The id of the location.
+
+        Returns:
+            float: The weight.
+        """
+        raise NotImplementedError
+
+    def agents_of_location(self, location_id: int) -> list:
+        """Return the agents connected with a location.
+
+        Args:
+            location_id: The id of the location.
+
+        Returns:
+            list: A list of agents.
+        """
+        raise NotImplementedError
+
+    def locations_of_agent(self, agent_id: int) -> list:
+        """Return the locations connected with an agent.
+
+        Args:
+            agent_id: The id of the agent.
+
+        Returns:
+            list: A list of locations.
+        """
+        raise NotImplementedError
+
+    def agents_of_locations(self, location_ids: typing.Iterable[int]) -> list:
+        """Return the union of the agents connected with the given locations.
+
+        Args:
+            location_ids: The ids of the locations.
+
+        Returns:
+            list: A list of agents without duplicates.
+        """
+        raise NotImplementedError
+
+    def locations_between_agents(self, agent_id1: int, agent_id2: int) -> list:
+        """Return the locations that two agents are both connected with.
+
+        Args:
+            agent_id1: The id of the first agent.
+            agent_id2: The id of the second agent.
+
+        Returns:
+            list: A list of locations in the order of the first agent's memberships.
+        """
+        raise NotImplementedError
+
+    def agents_between_locations(self, location_id1: int, location_id2: int) -> list:
+        """Return the agents that are connected with both locations.
+
+        Args:
+            location_id1: The id of the first location.
+            location_id2: The id of the second location.
+
+        Returns:
+            list: A list of agents in the order of the first location's memberships.
+        """
+        raise NotImplementedError
+
+    def incidence_matrix(self) -> sp.csr_matrix:
+        """Return the weighted agent x location incidence matrix.
+
+        Rows follow the order of :attr:`agents`, columns follow the order of :attr:`locations`.
+        Memberships with a weight of zero are kept as explicitly stored zeros.
+
+        Returns:
+            sp.csr_matrix: A sparse matrix that holds the weight of each membership.
+        """
+        raise NotImplementedError
+
+    def to_networkx(self) -> nx.Graph:
+        """Return the stored network as a bipartite :class:`networkx.Graph`.
+
+        Agents are nodes with ``bipartite=0``, locations are nodes with ``bipartite=1``.
+        Each node stores its object in the node attribute ``_obj``.
+
+        Returns:
+            nx.Graph: The bipartite network.
+        """
+        raise NotImplementedError
+
+
+class NetworkxStorage(Storage):
+    """Stores the model's network in a :class:`networkx.Graph`.
+
+    This is the default backend. It is flexible and cheap to mutate, but every node and every
+    edge is a Python dictionary, which becomes expensive for very large populations.
+    """
+
+    def __init__(self) -> None:
+        """Create an empty storage."""
+        super().__init__()
+        self.graph = nx.Graph()
+
+    def add_agent(self, agent: _agent.Agent) -> None:  # noqa: D102
+        if not self.graph.has_node(agent.id):
+            self.graph.add_node(agent.id, bipartite=0, _obj=agent)
+            self.agents[agent.id] = agent
+
+    def add_location(self, location: _location.Location) -> None:  # noqa: D102
+        if not self.graph.has_node(location.id):
+            self.graph.add_node(location.id, bipartite=1, _obj=location)
+            self.locations[location.id] = location
+
+    def remove_agent(self, agent_id: int) -> None:  # noqa: D102
+        if self.graph.has_node(agent_id):
+            self.graph.remove_node(agent_id)
+            self.agents.pop(agent_id, None)
+
+    def remove_location(self, location_id: int) -> None:  # noqa: D102
+        if self.graph.has_node(location_id):
+            self.graph.remove_node(location_id)
+            self.locations.pop(location_id, None)
+
+    def remove_agents(self, agent_ids: list[int]) -> None:  # noqa: D102
+        self.graph.remove_nodes_from(agent_ids)
+        for agent_id in agent_ids:
+            self.agents.pop(agent_id, None)
+
+    def remove_locations(self, location_ids: list[int]) -> None:  # noqa: D102
+        self.graph.remove_nodes_from(location_ids)
+        for location_id in location_ids:
+            self.locations.pop(location_id, None)
+
+    def has_agent(self, agent_id: int) -> bool:  # noqa: D102
+        return self.graph.has_node(agent_id)
+
+    def has_location(self, location_id: int) -> bool:  # noqa: D102
+        return self.graph.has_node(location_id)
+
+    def add_membership(  # noqa: D102
+        self,
+        agent_id: int,
+        location_id: int,
+        weight: float,
+        **kwargs,
+    ) -> None:
+        self.graph.add_edge(agent_id, location_id, **kwargs)
+        self.set_weight(agent_id, location_id, weight)
+
+    def add_memberships(  # noqa: D102
+        self,
+        agent_ids: list[int],
+        location_ids: list[int],
+        weights: list[float],
+        **kwargs,
+    ) -> None:
+        self.graph.add_edges_from(
+            (agent_id, location_id, {**kwargs, "weight": weight})
+            for agent_id, location_id, weight in zip(agent_ids, location_ids, weights)
+        )
+
+    def remove_membership(self, agent_id: int, location_id: int) -> None:  # noqa: D102
+        if self.graph.has_edge(agent_id, location_id):
+            self.graph.remove_edge(agent_id, location_id)
+
+    def remove_memberships(  # noqa: D102
+        self,
+        agent_ids: list[int],
+        location_ids: list[int],
+    ) -> None:
+        self.graph.remove_edges_from(zip(agent_ids, location_ids))
+
+    def has_membership(self, agent_id: int, location_id: int) -> bool:  # noqa: D102
+        return self.graph.has_edge(agent_id, location_id)
+
+    def set_weight(self, agent_id: int, location_id: int, weight: float) -> None:  # noqa: D102
+        self.graph[agent_id][location_id]["weight"] = weight
+
+    def set_location_weights(  # noqa: D102
+        self,
+        location_id: int,
+        weights: typing.Iterable[float],
+    ) -> None:
+        nodes = self.graph.nodes
+        adjacency = self.graph[location_id]
+        agent_ids = [node for node in adjacency if nodes[node]["bipartite"] == 0]
+        for agent_id, weight in zip(agent_ids, weights):
+            adjacency[agent_id]["weight"] = weight
+
+    def get_weight(self, agent_id: int, location_id: int) -> float:  # noqa: D102
+        return self.graph[agent_id][location_id]["weight"]
+
+    def agents_of_location(self, location_id: int) -> list:  # noqa: D102
+        nodes = self.graph.nodes
+        return [
+            nodes[node]["_obj"]
+            for node in self.graph.neighbors(location_id)
+            if nodes[node]["bipartite"] == 0
+        ]
+
+    def locations_of_agent(self, agent_id: int) -> list:  # noqa: D102
+        nodes = self.graph.nodes
+        return [
+            nodes[node]["_obj"]
+            for node in self.graph.neighbors(agent_id)
+            if nodes[node]["bipartite"] == 1
+        ]
+
+    def agents_of_locations(self, location_ids: typing.Iterable[int]) -> list:  # noqa: D102
+        nodes = self.graph.nodes
+        agent_ids = {
+            node
+            for location_id in location_ids
+            for node in self.graph.neighbors(location_id)
+            if nodes[node]["bipartite"] == 0
+        }
+        return [nodes[agent_id]["_obj"] for agent_id in agent_ids]
+
+    def locations_between_agents(self, agent_id1: int, agent_id2: int) -> list:  # noqa: D102
+        return self._common_neighbors(agent_id1, agent_id2)
+
+    def agents_between_locations(  # noqa: D102
+        self,
+        location_id1: int,
+        location_id2: int,
+    ) -> list:
+        return self._common_neighbors(location_id1, location_id2)
+
+    def _common_neighbors(self, node1: int, node2: int) -> list:
+        adj = self.graph.adj
+        neighbors2 = adj[node2]
+        return [
+            self.graph.nodes[node]["_obj"]
+            for node in adj[node1]
+            if node in neighbors2 and node != node1 and node != node2
+        ]
+
+    def incidence_matrix(self) -> sp.csr_matrix:  # noqa: D102
+        agent_positions = {agent_id: i for i, agent_id in enumerate(self.agents)}
+        location_positions = {location_id: i for i, location_id in enumerate(self.locations)}
+
+        rows, cols, weights = [], [], []
+        for node1, node2, weight in self.graph.edges(data="weight"):
+            if node1 in agent_positions and node2 in location_positions:
+                agent_id, location_id = node1, node2
+            elif node2 in agent_positions and node1 in location_positions:
+                agent_id, location_id = node2, node1
+            else:
+                continue
+            rows.append(agent_positions[agent_id])
+            cols.append(location_positions[location_id])
+            weights.append(weight)
+
+        return sp.csr_matrix(
+            (np.array(weights, dtype=np.float64), (rows, cols)),
+            shape=(len(agent_positions), len(location_positions)),
+        )
+
+    def to_networkx(self) -> nx.Graph:
+        """Return the underlying graph itself (not a copy).
+
+        Returns:
+            nx.Graph: The bipartite network.
+        """
+        return self.graph
+
+
+class ArrayStorage(Storage):
+    """Stores the model's network in typed NumPy arrays.
+
+    Agents and locations get dense integer indices. Memberships are kept as parallel arrays
+    (agent index, location index, weight) and are indexed in both directions by compressed
+    sparse row (CSR) offsets, so memberships cost a few bytes each instead of several Python
+    dictionaries.
+
+    Memberships that are added after the CSR offsets were built are collected in small pending
+    lists until their number exceeds the number of indexed memberships; then the CSR offsets are
+    rebuilt in one vectorized pass. Removed memberships are only flagged and dropped on the next
+    rebuild. Hence, single insertions and removals stay cheap in amortized terms, while the backend
+    is at its best for populations that are built once and mostly queried afterwards.
+    """
+
+    _MIN_REBUILD = 1024
+
+    def __init__(self) -> None:
+        """Create an empty storage."""
+        super().__init__()
+        self._agent_index: dict[int, int] = {}
+        self._agent_objs: list = []
+        self._location_index: dict[int, int] = {}
+        self._location_objs: list = []
+
+        self._edge_agent = np.empty(0, dtype=np.int32)
+        self._edge_location = np.empty(0, dtype=np.int32)
+        self._edge_weight = np.empty(0, dtype=np.float64)
+        self._edge_alive = np.empty(0, dtype=bool)
+        self._edge_attrs: dict[int, dict] = {}
+        self._n_edges = 0
+        self._n_dead = 0
+
+        # per side (0: rows are agents, 1: rows are locations): CSR offsets and edge slots
+        self._indptr: list[np.ndarray] = [np.zeros(1, dtype=np.int64)] * 2
+        self._slots: list[np.ndarray] = [np.empty(0, dtype=np.int64)] * 2
+        self._n_indexed = 0
+        self._pending: list[dict[int, list[int]]] = [{}, {}]
+        self._n_pending = 0
+
+    def add_agent(self, agent: _agent.Agent) -> None:  # noqa: D102
+        if agent.id not in self._agent_index:
+            self._agent_index[agent.id] = len(self._agent_objs)
+            self._agent_objs.append(agent)
+            self.agents[agent.id] = agent
+
+    def add_location(self, location: _location.Location) -> None:  # noqa: D102
+        if location.id not in self._location_index:
+            self._location_index[location.id] = len(self._location_objs)
+            self._location_objs.append(location)
+            self.locations[location.id] = location
+
+    def remove_agent(self, agent_id: int) -> None:  # noqa: D102
+        if agent_id in self._agent_index:
+            index = self._agent_index.pop(agent_id)
+            self._kill_edges(self._edges_of(0, index))
+            self._agent_objs[index] = None
+            del self.agents[agent_id]
+
+    def remove_location(self, location_id: int) -> None:  # noqa: D102
+        if location_id in self._location_index:
+            index = self._location_index.pop(location_id)
+            self._kill_edges(self._edges_of(1, index))
+            self._location_objs[index] = None
+            del self.locations[location_id]
+
+    def remove_agents(self, agent_ids: list[int]) -> None:  # noqa: D102
+        indices = [self._agent_index.pop(i) for i in agent_ids if i in self._agent_index]
+        self._kill_edges(self._edges_of_many(0, indices))
+        for index in indices:
+            del self.agents[self._agent_objs[index].id]
+            self._agent_objs[index] = None
+
+    def remove_locations(self, location_ids: list[int]) -> None:  # noqa: D102
+        indices = [self._location_index.pop(i) for i in location_ids if i in self._location_index]
+        self._kill_edges(self._edges_of_many(1, indices))
+        for index in indices:
+            del self.locations[self._location_objs[index].id]
+            self._location_objs[index] = None
+
+    def has_agent(self, agent_id: int) -> bool:  # noqa: D102
+        return agent_id in self._agent_index
+
+    def has_location(self, location_id: int) -> bool:  # noqa: D102
+        return location_id in self._location_index
+
+    def add_membership(  # noqa: D102
+        self,
+        agent_id: int,
+        location_id: int,
+        weight: float,
+        **kwargs,
+    ) -> None:
+        agent_index = self._agent_index[agent_id]
+        location_index = self._location_index[location_id]
+
+        slot = self._find_edge(agent_index, location_index)
+        if slot is None:
+            slot = self._append_edge(agent_index, location_index)
+        self._edge_weight[slot] = weight
+        if kwargs:
+            self._edge_attrs.setdefault(slot, {}).update(kwargs)
+
+    def add_memberships(  # noqa: D102
+        self,
+        agent_ids: list[int],
+        location_ids: list[int],
+        weights: list[float],
+        **kwargs,
+    ) -> None:
+        # small batches are cheaper one by one than with a scan over all memberships
+        if len(agent_ids) < self._MIN_REBUILD:
+            super().add_memberships(agent_ids, location_ids, weights, **kwargs)
+            return
+
+        agent_indices = np.array([self._agent_index[i] for i in agent_ids], dtype=np.int64)
+        location_indices = np.array(
+            [self._location_index[i] for i in location_ids],
+            dtype=np.int64,
+        )
+        weights = np.asarray(weights, dtype=np.float64)
+
+        # if a pair occurs more than once, it keeps its first position but its last weight
+        n_locations = len(self._location_objs)
+        keys = agent_indices * n_locations + location_indices
+        unique_keys, first = np.unique(keys, return_index=True)
+        _, last = np.unique(keys[::-1], return_index=True)
+        order = np.argsort(first)
+        first, last = first[order], (len(keys) - 1 - last)[order]
+        agent_indices, location_indices = agent_indices[first], location_indices[first]
+        keys, weights = unique_keys[order], weights[last]
+
+        # update memberships that already exist
+        alive = np.flatnonzero(self._edge_alive[: self._n_edges])
+        existing_keys = (
+            self._edge_agent[alive].astype(np.int64) * n_locations + self._edge_location[alive]
+        )
+        is_new = ~np.isin(keys, existing_keys)
+        if not is_new.all():
+            order = np.argsort(existing_keys)
+            positions = np.searchsorted(existing_keys, keys[~is_new], sorter=order)
+            existing_slots = alive[order[positions]]
+            self._edge_weight[existing_slots] = weights[~is_new]
+            if kwargs:
+                for slot in existing_slots.tolist():
+                    self._edge_attrs.setdefault(slot, {}).update(kwargs)
+
+        # append the new ones and index them in one pass
+        n_new = int(is_new.sum())
+        if self._n_edges + n_new > len(self._edge_alive):
+            self._grow(max(2 * self._n_edges, self._n_edges + n_new))
+
+        new_slots = np.arange(self._n_edges, self._n_edges + n_new)
+        self._edge_agent[new_slots] = agent_indices[is_new]
+        self._edge_location[new_slots] = location_indices[is_new]
+        self._edge_weight[new_slots] = weights[is_new]
+        self._edge_alive[new_slots] = True
+        self._n_edges += n_new
+        if kwargs:
+            for slot in new_slots.tolist():
+                self._edge_attrs[slot] = dict(kwargs)
+
+        self._rebuild()
+
+    def remove_membership(self, agent_id: int, location_id: int) -> None:  # noqa: D102
+        slot = self._find_edge(self._agent_index[agent_id], self._location_index[location_id])
+        if slot is not None:
+            self._kill_edges(np.array([slot], dtype=np.int64))
+
+    def remove_memberships(  # noqa: D102
+        self,
+        agent_ids: list[int],
+        location_ids: list[int],
+    ) -> None:
+        agent_indices = [self._agent_index[i] for i in agent_ids]
+        location_indices = [self._location_index[i] for i in location_ids]
+
+        if len(agent_indices) < self._MIN_REBUILD:
+            slots = [
+                self._find_edge(agent_index, location_index)
+                for agent_index, location_index in zip(agent_indices, location_indices)
+            ]
+            slots = np.array([slot for slot in slots if slot is not None], dtype=np.int64)
+        else:
+            n_locations = len(self._location_objs)
+            keys = np.array(agent_indices, dtype=np.int64) * n_locations + location_indices
+            alive = np.flatnonzero(self._edge_alive[: self._n_edges])
+            alive_keys = (
+                self._edge_agent[alive].astype(np.int64) * n_locations + self._edge_location[alive]
+            )
+            slots = alive[np.isin(alive_keys, keys)]
+
+        self._kill_edges(np.unique(slots))
+
+    def has_membership(self, agent_id: int, location_id: int) -> bool:  # noqa: D102
+        if agent_id not in self._agent_index or location_id not in self._location_index:
+            return False
+        return (
+            self._find_edge(self._agent_index[agent_id], self._location_index[location_id])
+            is not None
+        )
+
+    def set_weight(self, agent_id: int, location_id: int, weight: float) -> None:  # noqa: D102
+        self._edge_weight[self._get_edge(agent_id, location_id)] = weight
+
+    def set_location_weights(  # noqa: D102
+        self,
+        location_id: int,
+        weights: typing.Iterable[float],
+    ) -> None:
+        slots = self._edges_of(1, self._location_index[location_id])
+        self._edge_weight[slots] = np.asarray(weights, dtype=np.float64)
+
+    def get_weight(self, agent_id: int, location_id: int) -> float:  # noqa: D102
+        return self._edge_weight[self._get_edge(agent_id, location_id)].item()
+
+    def agents_of_location(self, location_id: int) -> list:  # noqa: D102
+        slots = self._edges_of(1, self._location_index[location_id])
+        return [self._agent_objs[index] for index in self._edge_agent[slots].tolist()]
+
+    def locations_of_agent(self, agent_id: int) -> list:  # noqa: D102
+        slots = self._edges_of(0, self._agent_index[agent_id])
+        return [self._location_objs[index] for index in self._edge_location[slots].tolist()]
+
+    def agents_of_locations(self, location_ids: typing.Iterable[int]) -> list:  # noqa: D102
+        slots = [self._edges_of(1, self._location_index[i]) for i in location_ids]
+        if not slots:
+            return []
+        agent_indices = np.unique(self._edge_agent[np.concatenate(slots)])
+        return [self._agent_objs[index] for index in agent_indices.tolist()]
+
+    def locations_between_agents(self, agent_id1: int, agent_id2: int) -> list:  # noqa: D102
+        locations1 = self._edge_location[self._edges_of(0, self._agent_index[agent_id1])]
+        locations2 = self._edge_location[self._edges_of(0, self._agent_index[agent_id2])]
+        shared = locations1[np.isin(locations1, locations2)]
+        return [self._location_objs[index] for index in shared.tolist()]
+
+    def agents_between_locations(  # noqa: D102
+        self,
+        location_id1: int,
+        location_id2: int,
+    ) -> list:
+        agents1 = self._edge_agent[self._edges_of(1, self._location_index[location_id1])]
+        agents2 = self._edge_agent[self._edges_of(1, self._location_index[location_id2])]
+        shared = agents1[np.isin(agents1, agents2)]
+        return [self._agent_objs[index] for index in shared.tolist()]
+
+    def incidence_matrix(self) -> sp.csr_matrix:  # noqa: D102
+        # the dicts are ordered by insertion, i.e. by ascending index
+        agent_positions = np.full(len(self._agent_objs), -1, dtype=np.int64)
+        agent_positions[np.fromiter(self._agent_index.values(), dtype=np.int64)] = np.arange(
+            len(self._agent_index)
+        )
+        location_positions = np.full(len(self._location_objs), -1, dtype=np.int64)
+        location_positions[np.fromiter(self._location_index.values(), dtype=np.int64)] = np.arange(
+            len(self._location_index)
+        )
+
+        slots = np.flatnonzero(self._edge_alive[: self._n_edges])
+        return sp.csr_matrix(
+            (
+                self._edge_weight[slots],
+                (
+                    agent_positions[self._edge_agent[slots]],
+                    location_positions[self._edge_location[slots]],
+                ),
+            ),
+            shape=(len(self._agent_index), len(self._location_index)),
+        )
+
+    def to_networkx(self) -> nx.Graph:
+        """Build a bipartite graph from the stored arrays.
+
+        The graph is a snapshot. Changing it does not change the storage.
+
+        Returns:
+            nx.Graph: The bipartite network.
+        """
+        graph = nx.Graph()
+        graph.add_nodes_from(
+            (agent_id, {"bipartite": 0, "_obj": agent}) for agent_id, agent in self.agents.items()
+        )
+        graph.add_nodes_from(
+            (location_id, {"bipartite": 1, "_obj": location})
+            for location_id, location in self.locations.items()
+        )
+
+        slots = np.flatnonzero(self._edge_alive[: self._n_edges])
+        agent_objs = self._agent_objs
+        location_objs = self._location_objs
+        for slot, agent_index, location_index, weight in zip(
+            slots.tolist(),
+            self._edge_agent[slots].tolist(),
+            self._edge_location[slots].tolist(),
+            self._edge_weight[slots].tolist(),
+        ):
+            graph.add_edge(
+                agent_objs[agent_index].id,
+                location_objs[location_index].id,
+                **self._edge_attrs.get(slot, {}),
+                weight=weight,
+            )
+        return graph
+
+    def _get_edge(self, agent_id: int, location_id: int) -> int:
+        slot = self._find_edge(self._agent_index[agent_id], self._location_index[location_id])
+        if slot is None:
+            raise KeyError((agent_id, location_id))
+        return slot
+
+    def _find_edge(self, agent_index: int, location_index: int) -> int | None:
+        slots = self._edges_of(0, agent_index)
+        found = slots[self._edge_location[slots] == location_index]
+        return int(found[0]) if len(found) > 0 else None
+
+    def _edges_of(self, side: int, index: int) -> np.ndarray:
+        indptr = self._indptr[side]
+        if index < len(indptr) - 1:
+            slots = self._slots[side][indptr[index] : indptr[index + 1]]
+        else:
+            slots = self._slots[side][:0]
+
+        pending = self._pending[side].get(index)
+        if pending:
+            slots = np.concatenate([slots, np.array(pending, dtype=np.int64)])
+
+        return slots[self._edge_alive[slots]]
+
+    def _edges_of_many(self, side: int, indices: list[int]) -> np.ndarray:
+        if len(indices) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # small batches are cheaper row by row than with a scan over all memberships
+        if len(indices) < self._MIN_REBUILD:
+            return np.concatenate([self._edges_of(side, index) for index in indices])
+
+        rows = (self._edge_agent if side == 0 else self._edge_location)[: self._n_edges]
+        return np.flatnonzero(self._edge_alive[: self._n_edges] & np.isin(rows, indices))
+
+    def _append_edge(self, agent_index: int, location_index: int) -> int:
+        # rebuild before appending, since a rebuild renumbers the slots
+        if self._n_pending >= max(self._MIN_REBUILD, self._n_indexed):
+            self._rebuild()
+        if self._n_edges == len(self._edge_alive):
+            self._grow(max(2 * self._n_edges, self._MIN_REBUILD))
+
+        slot = self._n_edges
+        self._edge_agent[slot] = agent_index
+        self._edge_location[slot] = location_index
+        self._edge_alive[slot] = True
+        self._n_edges += 1
+
+        self._pending[0].setdefault(agent_index, []).append(slot)
+        self._pending[1].setdefault(location_index, []).append(slot)
+        self._n_pending += 1
+
+        return slot
+
+    def _kill_edges(self, slots: np.ndarray) -> None:
+        if len(slots) == 0:
+            return
+        self._edge_alive[slots] = False
+        for slot in slots.tolist():
+            self._edge_attrs.pop(slot, None)
+        self._n_dead += len(slots)
+        if self._n_dead > max(self._MIN_REBUILD, self._n_edges // 2):
+            self._rebuild()
+
+    def _grow(self, capacity: int) -> None:
+        for name in ("_edge_agent", "_edge_location", "_edge_weight", "_edge_alive"):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[: self._n_edges] = old[: self._n_edges]
+            setattr(self, name, new)
+
+    def _rebuild(self) -> None:
+        """Drop removed memberships and rebuild the CSR offsets of both sides."""
+        n = self._n_edges
+        alive = self._edge_alive[:n]
+
+        if self._n_dead > 0:
+            new_slots = np.cumsum(alive) - 1
+            keep = np.flatnonzero(alive)
+            n = len(keep)
+            for name in ("_edge_agent", "_edge_location", "_edge_weight"):
+                array = getattr(self, name)
+                array[:n] = array[keep]
+            self._edge_alive[:n] = True
+            self._edge_alive[n:] = False
+            self._edge_attrs = {
+                int(new_slots[slot]): attrs for slot, attrs in self._edge_attrs.items()
+            }
+            self._n_edges = n
+            self._n_dead = 0
+
+        for side, rows, n_rows in (
+            (0, self._edge_agent[:n], len(self._agent_objs)),
+            (1, self._edge_location[:n], len(self._location_objs)),
+        ):
+            indptr = np.zeros(n_rows + 1, dtype=np.int64)
+            np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+            self._indptr[side] = indptr
+            self._slots[side] = np.argsort(rows, kind="stable").astype(np.int64)
+
+        self._n_indexed = n
+        self._pending = [{}, {}]
+        self._n_pending = 0
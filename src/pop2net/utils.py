@@ -2,10 +2,12 @@
 
 from __future__ import annotations
 
+import hashlib
 import inspect
 import typing
 
 import numpy as np
+import pandas as pd
 
 
 def group_it(
@@ -87,5 +89,80 @@ def _get_cls_as_str(cls_):
         return cls_.__class__.__name__
 
 
+def _get_vars(obj) -> dict:
+    # like vars(), but including the attributes of a ColumnarAgent kept by the model
+    attrs = vars(obj)
+    row = attrs.get("_row")
+    if row is None:
+        return attrs
+
+    attrs = {key: value for key, value in attrs.items() if key != "_row"}
+    attrs.update(obj.model.agent_attributes.row(row))
+    return attrs
+
+
 def _join_positions(pos1, pos2):
     return "-".join(sorted([str(pos1), str(pos2)]))
+
+
+class _StableKey:
+    # gives a value a hash that does not depend on the hash randomization of strings
+    __slots__ = ("_hash", "value")
+
+    def __init__(self, value) -> None:
+        self.value = value
+        self._hash = _stable_hash(value)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        return self.value == other.value
+
+
+def _stable_hash(value) -> int:
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        digest = hashlib.blake2b(value, digest_size=8).digest()
+        return int.from_bytes(digest, "little", signed=True)
+    if isinstance(value, tuple):
+        return hash(tuple(_stable_hash(v) for v in value))
+    return hash(value)
+
+
+def _set_order(values: typing.Iterable) -> list:
+    """Return the unique values in the order in which a set of them would be iterated.
+
+    Numbers keep exactly the order of a built-in set, but strings are hashed in a way that does
+    not change between Python processes, so the order is reproducible.
+    """
+    return [key.value for key in {_StableKey(value) for value in values}]
+
+
+def _group_offsets(values: typing.Iterable) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Index the rows of each group of equal values.
+
+    The groups are numbered in order of their first appearance.
+
+    Returns:
+        tuple: The row positions sorted by group, and the start and the length of each group in
+            the sorted row positions.
+    """
+    codes, _ = pd.factorize(pd.Series(values), use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+    lengths = np.bincount(codes)
+    return order, np.cumsum(lengths) - lengths, lengths
+
+
+def _gather_groups(
+    order: np.ndarray,
+    starts: np.ndarray,
+    lengths: np.ndarray,
+    groups: np.ndarray,
+) -> np.ndarray:
+    """Return the row positions of the given groups, one group after another."""
+    group_lengths = lengths[groups]
+    offsets = np.cumsum(group_lengths) - group_lengths
+    positions = np.repeat(starts[groups] - offsets, group_lengths)
+    return order[positions + np.arange(len(positions))]
@@ -1,8 +1,28 @@
 import pytest
 
+import pop2net as p2n
 from pop2net.data_fakers import soep
 
 
+class ArrayModel(p2n.Model):
+    storage_class = p2n.ArrayStorage
+
+
+@pytest.fixture(params=[p2n.Model, ArrayModel])
+def model_cls(request):
+    return request.param
+
+
+@pytest.fixture
+def model(model_cls):
+    return model_cls()
+
+
+@pytest.fixture
+def array_model():
+    return ArrayModel()
+
+
 @pytest.fixture(scope="session")
 def soep10():
     return soep(size=10, seed=10)
@@ -0,0 +1,134 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pop2net as p2n
+
+
+class Person(p2n.ColumnarAgent):
+    def setup(self):
+        self.infected = False
+
+
+class Home(p2n.MagicLocation):
+    def split(self, agent):
+        return agent.household
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "age": [10, 35, 70],
+            "income": [0.0, 2500.5, 1200.0],
+            "status": ["pupil", "employed", "retired"],
+            "household": [1, 1, 2],
+        },
+    )
+
+
+def test_columnar_attributes(df):
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    agents = creator.create_agents(df=df, agent_class=Person)
+
+    # the attributes are kept by the model, not by the agents
+    assert "age" not in vars(agents[0])
+    assert model.agent_attributes.columns["age"].dtype == np.int64
+    assert [agent.age for agent in agents] == [10, 35, 70]
+    assert isinstance(agents[0].age, int)
+    assert agents[1].status == "employed"
+    assert agents[0].infected is False
+
+    agents[0].age += 1
+    agents[1].age = 35.5
+    agents[2].infected = True
+    assert list(model.agent_attributes.column("age", agents)) == [11, 35.5, 70]
+    assert list(model.agent_attributes.column("income", agents[1:])) == [2500.5, 1200.0]
+    assert agents[2].infected is True
+
+    with pytest.raises(AttributeError):
+        agents[0].unknown  # noqa: B018
+
+    graph = model.export_agent_network(node_attrs=["age", "status"])
+    assert [graph.nodes[agent.id]["age"] for agent in agents] == [11, 35.5, 70]
+    assert graph.nodes[agents[0].id]["status"] == "pupil"
+
+
+def test_columnar_agents_in_locations(df):
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    creator.create(df=df, agent_class=Person, location_classes=[Home])
+
+    assert sorted(len(location.agents) for location in model.locations) == [1, 2]
+    assert all(
+        len({agent.household for agent in location.agents}) == 1 for location in model.locations
+    )
+
+
+def test_mixed_agent_classes(df):
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    agents = creator.create_agents(
+        df=df,
+        agent_class_attr="status",
+        agent_class_dict={"pupil": p2n.Agent, "employed": Person, "retired": Person},
+    )
+
+    assert vars(agents[0])["age"] == 10
+    assert "age" not in vars(agents[1])
+    assert [agent.age for agent in agents] == [10, 35, 70]
+    assert model.agent_attributes.n_rows == 2
+
+    # further agents get new rows
+    more_agents = creator.create_agents(df=df[["age"]], agent_class=Person)
+    assert model.agent_attributes.n_rows == 5
+    assert [agent.age for agent in more_agents] == [10, 35, 70]
+    assert more_agents[0].status is None
+
+
+def test_location_attributes(df):
+    class Group(p2n.MagicLocation):
+        n_agents = 2
+
+    for agent_class in [p2n.Agent, Person]:
+        model = p2n.Model()
+        creator = p2n.Creator(model)
+        creator.create(df=df, agent_class=agent_class, location_classes=[Group])
+
+        for location in model.locations:
+            agents = list(location.agents)
+            assert [agent.Group_position for agent in agents] == list(range(len(agents)))
+            assert [agent.Group_head for agent in agents] == [True] + [False] * (len(agents) - 1)
+            assert [agent.Group_tail for agent in agents] == [False] * (len(agents) - 1) + [True]
+            assert all(agent.Group_assigned is True for agent in agents)
+            assert len({agent.Group_id for agent in agents}) == 1
+
+        if agent_class is Person:
+            assert "Group_position" in model.agent_attributes.columns
+
+
+def test_set_many():
+    store = p2n.AttributeStore()
+    store.add_rows({"age": [10, 35, 70]}, n=3)
+
+    store.set_many([0, 2], "age", [11, 71.5])
+    store.set_many([1, 2], "member", True)
+    assert [store.get(row, "age") for row in range(3)] == [11, 35, 71.5]
+    assert [store.get(row, "member") for row in range(3)] == [None, True, True]
+
+
+def test_values_keep_their_type():
+    store = p2n.AttributeStore()
+    store.add_rows({"age": np.array([10, 35, 70], dtype=np.int32), "member": [1, 0, 1]}, n=3)
+
+    # integers are widened among themselves
+    store.set(0, "age", 2**40)
+    assert store.columns["age"].dtype == np.int64
+
+    # other kinds of values turn the column into objects instead of converting the other values
+    store.set(1, "age", 35.5)
+    store.set(2, "member", True)
+    assert [store.get(row, "age") for row in range(3)] == [2**40, 35.5, 70]
+    assert [type(store.get(row, "age")) for row in range(3)] == [int, float, int]
+    assert [type(store.get(row, "member")) for row in range(3)] == [int, int, bool]
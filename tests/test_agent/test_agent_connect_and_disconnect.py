@@ -170,3 +170,27 @@ def test_agent_disconnect_2():
     assert agent2 in model.locations[0].agents
 
     assert agent3 not in model.locations[0].agents
+
+
+def test_overwritten_add_location_is_used_in_bulk():
+    class Visitor(p2n.Agent):
+        def add_location(self, location):
+            super().add_location(location)
+            self.visits += 1
+
+        def remove_location(self, location):
+            super().remove_location(location)
+            self.visits -= 1
+
+    model = p2n.Model()
+    agent = Visitor(model)
+    agent.visits = 0
+    locations = p2n.LocationList(model, 3, p2n.Location)
+
+    agent.add_locations(locations)
+    assert agent.visits == 3
+    assert len(agent.locations) == 3
+
+    agent.remove_locations(locations[:2])
+    assert agent.visits == 1
+    assert len(agent.locations) == 1
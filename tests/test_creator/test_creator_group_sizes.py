@@ -0,0 +1,61 @@
+import random
+
+import pandas as pd
+import pytest
+
+import pop2net as p2n
+from pop2net.creator import _GroupSizes
+
+
+@pytest.mark.parametrize("best_fit", [False, True])
+def test_group_sizes_match_linear_scan(best_fit):
+    rng = random.Random(0)
+    sizes = [rng.randint(0, 5) for _ in range(3)]
+    group_sizes = _GroupSizes(sizes=sizes, best_fit=best_fit)
+
+    for _ in range(2000):
+        max_size = rng.randint(-1, 10)
+        fitting = [i for i, size in enumerate(sizes) if size <= max_size]
+        if not fitting:
+            expected = None
+        elif best_fit:
+            expected = min(fitting, key=lambda i: (-sizes[i], i))
+        else:
+            expected = fitting[0]
+        assert group_sizes.find(max_size) == expected
+
+        if rng.random() < 0.2:
+            sizes.append(rng.randint(0, 5))
+            group_sizes.append(sizes[-1])
+        else:
+            i = rng.randrange(len(sizes))
+            n = rng.randint(1, 3)
+            sizes[i] += n
+            group_sizes.grow(i, n)
+
+
+def test_best_fit_placement():
+    # households of 2, 3, 1 and 2 people, packed into two locations of 4 seats
+    df = pd.DataFrame({"household": [1, 1, 2, 2, 2, 3, 4, 4]})
+
+    def create(placement):
+        class Home(p2n.MagicLocation):
+            n_agents = 4
+            n_locations = 2
+
+            def stick_together(self, agent):
+                return agent.household
+
+        Home.placement = placement
+        model = p2n.Model()
+        p2n.Creator(model=model).create(df=df, location_classes=[Home])
+        return sorted(
+            sorted(agent.household for agent in location.agents) for location in model.locations
+        )
+
+    # first fit puts household 3 with household 1 and leaves no room for household 4
+    assert create("first_fit") == [[1, 1, 3], [2, 2, 2]]
+    assert create("best_fit") == [[1, 1, 4, 4], [2, 2, 2, 3]]
+
+    with pytest.raises(p2n.Pop2netException, match="placement"):
+        create("worst_fit")
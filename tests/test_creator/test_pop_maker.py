@@ -58,6 +58,31 @@ def test_create_agents(soep_fixture, request):
             assert row[col_name] == getattr(agents[i], col_name)
 
 
+def test_create_agents_with_agent_class_dict():
+    class Child(Agent):
+        pass
+
+    class Adult(Agent):
+        pass
+
+    df = simple_fake_data.assign(group=["child"] * 3 + ["adult"] * 7)
+
+    creator = p2n.Creator(model=Model())
+    agents = creator.create_agents(
+        df=df,
+        agent_class_attr="group",
+        agent_class_dict={"child": Child, "adult": Adult},
+    )
+
+    assert [type(agent) for agent in agents] == [Child] * 3 + [Adult] * 7
+    assert [agent.age for agent in agents] == list(df.age)
+    assert all(type(agent.hid) is int for agent in agents)
+    assert list(creator.model.agents) == list(agents)
+
+    with pytest.raises(Exception, match="`id`"):
+        creator.create_agents(df=df.assign(id=1))
+
+
 @pytest.mark.skip
 # @pytest.mark.parametrize("soep_fixture", ["soep100", "soep1000"])
 def test_create_locations():
@@ -81,5 +106,63 @@ def test_create_locations():
             assert location.group(agent) == location.group_id
 
 
+def test_create_locations_leaves_no_temporary_state():
+    df = pd.DataFrame({"status": ["pupil", "pupil", "teacher", "retired"]})
+
+    class School(p2n.MagicLocation):
+        def filter(self, agent):
+            return agent.status != "retired"
+
+    class Classroom(p2n.MagicLocation):
+        n_agents = 2
+
+        def filter(self, agent):
+            return agent.status != "retired"
+
+        def nest(self):
+            return School
+
+    model = p2n.Model()
+    creator = p2n.Creator(model=model)
+    creator.create(df=df, location_classes=[School, Classroom])
+
+    assert [len(agent.locations) for agent in model.agents] == [2, 2, 2, 0]
+    for agent in model.agents:
+        assert not any(attr.startswith("_P2NTEMP") for attr in vars(agent))
+    assert creator._method_values == {}
+    assert creator._melt_location_weights == {}
+    assert len(creator._dummy_model.agents) == 0
+    assert len(creator._dummy_model.locations) == 0
+
+
+def test_draw_sample_by_sample_level():
+    df = pd.DataFrame(
+        {
+            "hid": ["a", "b", "a", "c", "b", "a"],
+            "pid": [1, 2, 3, 4, 5, 6],
+            "weight": [1.0, 0.0, 0.0, 1.0, 0.0, 1.0],
+        },
+    )
+    creator = p2n.Creator(model=p2n.Model(), seed=1)
+
+    sample = creator.draw_sample(df, n=20, sample_level="hid")
+    assert 20 <= len(sample) < 20 + 3
+    assert list(sample.columns) == ["hid", "pid", "weight", "hid_original"]
+    households = {"a": [1, 3, 6], "b": [2, 5], "c": [4]}
+    for _, rows in sample.groupby("hid", sort=False):
+        assert list(rows["pid"]) == households[rows["hid_original"].iloc[0]]
+    # the last household is the one with which the sample reached n rows
+    assert len(sample) - len(sample[sample["hid"] == sample["hid"].max()]) < 20
+    assert list(sample["hid"].drop_duplicates()) == list(range(1, sample["hid"].max() + 1))
+
+    # households are weighted by the weight of their first row
+    sample = creator.draw_sample(df, n=20, sample_level="hid", sample_weight="weight")
+    assert set(sample["hid_original"]) == {"a", "c"}
+
+    sample = creator.draw_sample(df, n=5, sample_level="hid", replace_sample_level_column=False)
+    assert list(sample.columns) == ["hid", "pid", "weight"]
+    assert set(sample["hid"]) <= {"a", "b", "c"}
+
+
 if __name__ == "__main__":
     test_create_locations()
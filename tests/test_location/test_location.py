@@ -99,3 +99,26 @@ def test_location_size():
 #     creator.create_locations(location_classes=[Table])
 
 #     return model
+
+
+def test_overwritten_add_agent_is_used_in_bulk():
+    class Guestbook(Location):
+        def add_agent(self, agent):
+            super().add_agent(agent)
+            agent.signed = True
+
+        def remove_agent(self, agent):
+            super().remove_agent(agent)
+            agent.signed = False
+
+    model = Model()
+    loc = Guestbook(model=model)
+    agents = AgentList(model, 3, Agent)
+
+    loc.add_agents(agents)
+    assert len(loc.agents) == 3
+    assert all(agent.signed for agent in agents)
+
+    loc.remove_agents(agents[:2])
+    assert len(loc.agents) == 1
+    assert [agent.signed for agent in agents] == [False, False, True]
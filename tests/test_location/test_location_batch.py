@@ -0,0 +1,203 @@
+import timeit
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import pop2net as p2n
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame(
+        {
+            "status": ["pupil", "pupil", "teacher", "pupil", "retired", "pupil", "teacher"],
+            "school": [1, 2, 1, 1, 2, 2, 2],
+            "friends": [1, 1, 2, 2, 3, 3, 4],
+            "age": [8, 9, 40, 8, 70, 10, 50],
+        },
+    )
+
+
+class School(p2n.MagicLocation):
+    n_agents = 2
+
+    def filter(self, agent):
+        return agent.status != "retired"
+
+    def split(self, agent):
+        return agent.school
+
+    def stick_together(self, agent):
+        return agent.friends
+
+    def weight(self, agent):
+        return agent.age / 10
+
+
+class BatchSchool(School):
+    weight_attrs = ("age",)
+
+    def filter(self, agent):
+        raise AssertionError
+
+    def split(self, agent):
+        raise AssertionError
+
+    def stick_together(self, agent):
+        raise AssertionError
+
+    def weight(self, agent):
+        raise AssertionError
+
+    def filter_batch(self, df):
+        return df["status"] != "retired"
+
+    def split_batch(self, df):
+        return df["school"]
+
+    def stick_together_batch(self, df):
+        return df["friends"]
+
+    def weight_batch(self, attributes):
+        return attributes["age"] / 10
+
+
+def _memberships(model):
+    return [
+        (
+            location.split_value,
+            [(agent.id, location.get_weight(agent)) for agent in location.agents],
+        )
+        for location in model.locations
+    ]
+
+
+@pytest.mark.parametrize("agent_class", [p2n.Agent, p2n.ColumnarAgent])
+def test_batch_methods_match_agent_methods(df, agent_class):
+    results = []
+    for location_cls in [School, BatchSchool]:
+        model = p2n.Model()
+        creator = p2n.Creator(model)
+        creator.create(df=df, agent_class=agent_class, location_classes=[location_cls])
+        results.append(_memberships(model))
+
+    assert results[0] == results[1]
+    assert len(results[0]) == 4
+
+
+def test_bridge_batch(df):
+    class Mixer(p2n.MagicLocation):
+        def bridge(self, agent):
+            return agent.status if agent.status != "retired" else None
+
+    class BatchMixer(p2n.MagicLocation):
+        def bridge_batch(self, df):
+            return df["status"].where(df["status"] != "retired", None)
+
+    results = []
+    for location_cls in [Mixer, BatchMixer]:
+        model = p2n.Model()
+        creator = p2n.Creator(model)
+        creator.create(df=df, location_classes=[location_cls])
+        results.append(
+            [sorted(agent.id for agent in location.agents) for location in model.locations]
+        )
+
+    assert results[0] == results[1]
+    assert len(results[0]) == 4
+
+
+def test_batch_method_with_wrong_length(df):
+    class Broken(p2n.MagicLocation):
+        def filter_batch(self, df):
+            return np.ones(len(df) - 1, dtype=bool)
+
+    creator = p2n.Creator(p2n.Model())
+    with pytest.raises(p2n.Pop2netException, match="filter_batch"):
+        creator.create(df=df, location_classes=[Broken])
+
+
+def test_stick_together_batch_is_called_once(df):
+    calls = []
+
+    class Classroom(p2n.MagicLocation):
+        n_agents = 2
+
+        def split(self, agent):
+            return agent.school
+
+        def stick_together_batch(self, df):
+            calls.append(len(df))
+            return df["friends"]
+
+    creator = p2n.Creator(p2n.Model())
+    creator.create(df=df, location_classes=[Classroom])
+    assert calls == [len(df)]
+
+
+def test_default_weight_batch_follows_given_ids(df):
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    creator.create(df=df, location_classes=[School])
+
+    location = model.locations[0]
+    agents = [agent for agent in model.agents if agent not in location.agents][::-1]
+    weights = location.weight_batch({"id": np.array([agent.id for agent in agents])})
+    assert weights.tolist() == [agent.age / 10 for agent in agents]
+
+
+def test_batch_frame_is_built_from_columns(df, monkeypatch):
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    agents = creator.create_agents(df=df, agent_class=p2n.ColumnarAgent)
+    agents[0].nickname = "Ada"
+
+    # the attributes in the store are sliced by column instead of being read agent by agent
+    monkeypatch.delattr(p2n.AttributeStore, "get")
+    agents_df = creator._get_agents_df(list(agents))
+
+    assert agents_df.index.tolist() == [agent.id for agent in agents]
+    assert agents_df["age"].tolist() == df["age"].tolist()
+    assert agents_df["status"].tolist() == df["status"].tolist()
+    assert agents_df["nickname"].iloc[0] == "Ada"
+    assert agents_df["nickname"].iloc[1:].isna().all()
+    assert "model" not in agents_df
+
+
+def test_batch_method_is_faster_with_columnar_agents():
+    rng = np.random.default_rng(0)
+    n = 20_000
+    df = pd.DataFrame(
+        {
+            "status": rng.choice(["pupil", "teacher"], n),
+            "age": rng.integers(0, 100, n),
+            **{f"x{i}": rng.random(n) for i in range(6)},
+        },
+    )
+
+    class School(p2n.MagicLocation):
+        def filter(self, agent):
+            return agent.status == "pupil" and agent.age < 18
+
+    class BatchSchool(p2n.MagicLocation):
+        def filter_batch(self, df):
+            return (df["status"] == "pupil") & (df["age"] < 18)
+
+    creator = p2n.Creator(p2n.Model())
+    agents = list(creator.create_agents(df=df, agent_class=p2n.ColumnarAgent))
+
+    durations = []
+    results = []
+    for location_cls in [School, BatchSchool]:
+        dummy_location = creator._create_dummy_location(location_cls)
+
+        def filter_agents(dummy_location=dummy_location):
+            creator._method_values = {}
+            return creator._get_method_values(dummy_location, "filter", agents)
+
+        durations.append(min(timeit.repeat(filter_agents, number=1, repeat=5)))
+        results.append(filter_agents())
+
+    assert results[0] == results[1]
+    assert durations[1] < durations[0]
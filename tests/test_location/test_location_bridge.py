@@ -149,3 +149,25 @@ def test_4():
     assert len(model.agents[2].locations) == 0
     assert len(model.agents[3].locations) == 1
     assert len(model.agents[4].locations) == 0
+
+
+def test_bridge_is_called_once_per_agent():
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    agents = p2n.AgentList(model, 12, p2n.Agent)
+    for i, agent in enumerate(agents):
+        agent.group = i % 4
+
+    calls = []
+
+    class Mixer(p2n.MagicLocation):
+        def bridge(self, agent):
+            calls.append(agent.id)
+            return agent.group
+
+    creator.create_locations(location_classes=[Mixer])
+
+    assert sorted(calls) == sorted(agent.id for agent in agents)
+    assert len(model.locations) == 3
+    for location in model.locations:
+        assert sorted(agent.group for agent in location.agents) == [0, 1, 2, 3]
@@ -137,3 +137,41 @@ def test_2():
         if location.type == "School":
             for agent in location.agents:
                 assert all(agent.School == nghbr.School for nghbr in agent.neighbors())
+
+
+def test_deep_nesting():
+    df = pd.DataFrame({"region": [i % 2 for i in range(24)]})
+
+    class Region(p2n.MagicLocation):
+        def split(self, agent):
+            return agent.region
+
+    class Municipality(p2n.MagicLocation):
+        n_agents = 6
+
+        def nest(self):
+            return Region
+
+    class School(p2n.MagicLocation):
+        n_agents = 3
+
+        def nest(self):
+            return Municipality
+
+    class Classroom(School):
+        pass
+
+    model = p2n.Model()
+    creator = p2n.Creator(model=model)
+    creator.create(df=df, location_classes=[Region, Municipality, Classroom])
+
+    assert Counter(location.type for location in model.locations) == {
+        "Region": 2,
+        "Municipality": 4,
+        "Classroom": 8,
+    }
+
+    # every location is part of exactly one location of the level above
+    for lower, upper in [(Municipality, Region), (Classroom, Municipality)]:
+        for location in model.locations_of_type(lower):
+            assert len({agent.locations_of_type([upper])[0] for agent in location.agents}) == 1
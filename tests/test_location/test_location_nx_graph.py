@@ -192,3 +192,50 @@ def test_line_6():
 
     assert len(model.agents) == 5
     assert len(model.locations) == 0
+
+
+def test_grid_edges():
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    graph = nx.grid_2d_graph(4, 5)
+
+    class GridLocation(p2n.MagicLocation):
+        nxgraph = graph
+
+    agents = creator.create_agents(n=20)
+    creator.create_locations(location_classes=[GridLocation])
+
+    # each edge of the graph is one location of the agents at its two nodes
+    node_agents = dict(zip(graph.nodes, agents))
+    assert len(model.locations) == graph.number_of_edges()
+    assert {frozenset(location.agents) for location in model.locations} == {
+        frozenset((node_agents[u], node_agents[v])) for u, v in graph.edges
+    }
+    assert all(agent.GridLocation_position == i for i, agent in enumerate(agents))
+
+
+def test_group_ids_of_multiple_graphs():
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+
+    class LineLocation(p2n.MagicLocation):
+        nxgraph = nx.path_graph(3)
+
+    class Household(p2n.MagicLocation):
+        n_agents = 3
+
+        def nest(self):
+            return LineLocation
+
+    creator.create_agents(n=6)
+    creator.create_locations(location_classes=[LineLocation, Household])
+
+    lines = model.locations.select(model.locations.type == "LineLocation")
+    assert [location.group_id for location in lines] == [0, 0, 1, 1]
+    assert [location.subgroup_id for location in lines] == [0, 1, 0, 1]
+
+    households = model.locations.select(model.locations.type == "Household")
+    assert sorted(sorted(agent.id for agent in location.agents) for location in households) == [
+        [1, 2, 3],
+        [4, 5, 6],
+    ]
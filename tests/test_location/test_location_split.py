@@ -248,3 +248,30 @@ def test_3():
         )["m"]
         == 1
     )
+
+
+def test_split_value_lists():
+    df = pd.DataFrame({"status": ["A", "B", "A", "C"]})
+
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    calls = Counter()
+
+    class TestLocation(p2n.MagicLocation):
+        def split(self, agent):
+            calls[agent.id] += 1
+            # duplicate values must not add an agent to a location twice
+            return [agent.status, "all", "all"]
+
+    creator.create_agents(df=df)
+    creator.create_locations(location_classes=[TestLocation])
+
+    assert all(n == 1 for n in calls.values())
+    assert [location.split_value for location in model.locations] == [
+        "None-A",
+        "None-all",
+        "None-B",
+        "None-C",
+    ]
+    assert [len(location.agents) for location in model.locations] == [2, 4, 1, 1]
+    assert list(model.locations[1].agents) == list(model.agents)
@@ -153,3 +153,24 @@ def test_4():
     )
 
     inspector.plot_agent_network(agent_attrs=["group"])
+
+
+def test_stick_together_is_called_once_per_agent():
+    df = pd.DataFrame({"household": [1, 1, 2, 3, 3, 3]})
+    calls = []
+
+    class Home(p2n.MagicLocation):
+        n_agents = 3
+
+        def stick_together(self, agent):
+            calls.append(agent)
+            return agent.household
+
+    model = p2n.Model()
+    creator = p2n.Creator(model=model)
+    creator.create(df=df, location_classes=[Home])
+
+    assert len(calls) == len(df)
+    assert sorted(len(location.agents) for location in model.locations) == [3, 3]
+    for location in model.locations:
+        assert len({agent.household for agent in location.agents}) <= 2
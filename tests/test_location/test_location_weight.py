@@ -103,3 +103,23 @@ def test_3():
         else model.get_weight(agent, model.locations[0]) == 5
         for agent in model.locations[0].agents
     )
+
+
+def test_overwritten_add_agent_is_used_by_creator():
+    df = pd.DataFrame({"age": [10, 20, 30]})
+    added = []
+
+    class Home(p2n.MagicLocation):
+        def add_agent(self, agent):
+            super().add_agent(agent)
+            added.append(agent.id)
+
+        def weight(self, agent):
+            return agent.age / 10
+
+    model = p2n.Model()
+    creator = p2n.Creator(model)
+    agents = creator.create(df=df, location_classes=[Home])[0]
+
+    assert added == [agent.id for agent in agents]
+    assert [model.locations[0].get_weight(agent) for agent in agents] == [1, 2, 3]
@@ -0,0 +1,90 @@
+import random
+
+import numpy as np
+import pytest
+
+import pop2net as p2n
+
+
+def _contact_matrix_pairwise(agents, attr, weighted):
+    contacts = {}
+    values = set()
+    for agent_u in agents:
+        if getattr(agent_u, attr) is None:
+            continue
+        values.add(getattr(agent_u, attr))
+        for agent_v in agent_u.neighbors():
+            if getattr(agent_v, attr) is None:
+                continue
+            values.add(getattr(agent_v, attr))
+            contacts[frozenset((agent_u.id, agent_v.id))] = (
+                getattr(agent_u, attr),
+                getattr(agent_v, attr),
+                agent_u.get_agent_weight(agent_v) if weighted else 1,
+            )
+
+    matrix = {(u, v): 0 for u in values for v in values}
+    for u, v, weight in contacts.values():
+        matrix[u, v] += weight
+        matrix[v, u] += weight
+    return values, matrix
+
+
+@pytest.mark.parametrize("weighted", [True, False])
+@pytest.mark.parametrize("subset", [True, False])
+def test_create_contact_matrix(weighted, subset):
+    rng = random.Random(3)
+
+    class Home(p2n.Location):
+        def project_weights_batch(self, weights_u, weights_v):
+            return weights_u * weights_v
+
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 40, p2n.Agent)
+    for agent in agents:
+        agent.group = rng.choice(["a", "b", "c", None])
+
+    for location_cls in [p2n.Location, Home]:
+        for _ in range(8):
+            location = location_cls(model)
+            for agent in rng.sample(list(agents), 5):
+                location.add_agent(agent)
+                location.set_weight(agent, rng.choice([0, 1, 2]))
+
+    agents = agents[:20] if subset else None
+    df = p2n.NetworkInspector(model).create_contact_matrix(
+        agents=agents,
+        attr="group",
+        weighted=weighted,
+        plot=False,
+        return_df=True,
+    )
+
+    values, expected = _contact_matrix_pairwise(
+        model.agents if agents is None else agents,
+        "group",
+        weighted,
+    )
+    assert list(df.index) == sorted(values, reverse=True)
+    assert list(df.columns) == sorted(values)
+    for (u, v), weight in expected.items():
+        assert df.loc[u, v] == pytest.approx(weight)
+
+
+def test_project_weights_batch():
+    class Home(p2n.Location):
+        def project_weights_batch(self, weights_u, weights_v):
+            return (weights_u + weights_v) / 2
+
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    home = Home(model)
+    home.add_agents(agents)
+    for weight, agent in zip([1, 2, 4], agents):
+        home.set_weight(agent, weight)
+
+    assert agents[0].get_agent_weight(agents[2]) == 2.5
+    assert home.project_weights(agents[1], agents[2]) == 3
+
+    matrix = model.export_agent_network(return_sparse=True).toarray()
+    np.testing.assert_allclose(matrix, [[0, 1.5, 2.5], [1.5, 0, 3], [2.5, 3, 0]])
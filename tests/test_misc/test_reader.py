@@ -1,6 +1,9 @@
+import numpy as np
+import pandas as pd
 import pytest
 
 from pop2net.reader import DataReader
+from pop2net.reader import _alias_table
 
 
 def test_reader_small(soep100):
@@ -48,3 +51,58 @@ def test_sample_with_replacement_too_many(soep100):
     reader = DataReader(soep100, seed=5)
     sample = reader.sample(by="pid", size=101, with_replacement=True)
     assert len(sample) == 101
+
+
+def test_sample_keeps_groups_together():
+    df = pd.DataFrame({"hid": [1, 2, 1, 3, 2, 1], "pid": [1, 2, 3, 4, 5, 6]})
+    reader = DataReader(df, seed=5)
+    sample = reader.sample(by="hid", size=50)
+
+    assert len(sample) == 50
+    households = {1: [1, 3, 6], 2: [2, 5], 3: [4]}
+    position = 0
+    while position < len(sample):
+        rows = households[sample["hid"].iloc[position]]
+        assert list(sample["pid"].iloc[position : position + len(rows)]) == rows[: 50 - position]
+        position += len(rows)
+
+
+def test_sample_with_weights():
+    df = pd.DataFrame({"hid": [1, 2, 1, 3, 2], "weight": [3.0, 0.0, 3.0, 1.0, 0.0]})
+    reader = DataReader(df, seed=5)
+
+    for _ in range(2):
+        sample = reader.sample(by="hid", size=2000, weights="weight")
+        assert set(sample["hid"]) == {1, 3}
+        # group 1 is drawn three times as often as group 3, and has twice the rows
+        assert (sample["hid"] == 1).mean() == pytest.approx(6 / 7, abs=0.05)
+
+
+def test_alias_table():
+    p = np.array([0.1, 0.0, 0.5, 0.15, 0.25])
+    prob, alias = _alias_table(p)
+
+    implied = prob.copy()
+    for i, j in enumerate(alias):
+        implied[j] += 1 - prob[i]
+    assert implied / len(p) == pytest.approx(p)
+
+
+@pytest.mark.parametrize("with_replacement", [True, False])
+def test_sample_in_chunks(soep1000, with_replacement):
+    sample = DataReader(soep1000, seed=5).sample(
+        by="hid",
+        size=473,
+        with_replacement=with_replacement,
+    )
+    chunks = list(
+        DataReader(soep1000, seed=5).sample(
+            by="hid",
+            size=473,
+            with_replacement=with_replacement,
+            chunksize=100,
+        ),
+    )
+
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100, 100, 73]
+    assert pd.concat(chunks).equals(sample)
@@ -1,3 +1,5 @@
+import pytest
+
 import pop2net as p2n
 
 
@@ -29,3 +31,48 @@ def test_1():
 
     # assert that the locations cannot be found by id in the normal locations_list
     assert not all(agent is model.agents[agent.id] for agent in model.agents)
+
+
+def test_get_by_id():
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 5, p2n.Agent)
+    locations = p2n.LocationList(model, 5, p2n.Location)
+
+    for agent in agents:
+        assert model.get_agent(agent.id) is agent
+
+    for location in locations:
+        assert model.get_location(location.id) is location
+
+    ids = [agents[3].id, agents[0].id, agents[4].id]
+    assert list(model.get_agents(ids)) == [agents[3], agents[0], agents[4]]
+    assert isinstance(model.get_agents(ids), p2n.AgentList)
+
+    ids = [locations[2].id, locations[1].id]
+    assert list(model.get_locations(ids)) == [locations[2], locations[1]]
+    assert isinstance(model.get_locations(ids), p2n.LocationList)
+
+    # an agent id is not a location id
+    with pytest.raises(KeyError):
+        model.get_location(agents[0].id)
+
+    # the lookups follow removals
+    model.remove_agent(agents[0])
+    assert agents[0].id not in model.agents_by_id
+    with pytest.raises(KeyError):
+        model.get_agent(agents[0].id)
+
+
+def test_remove_while_iterating_by_id():
+    model = p2n.Model()
+    p2n.AgentList(model, 5, p2n.Agent)
+    p2n.LocationList(model, 5, p2n.Location)
+
+    # the dictionaries are copies, so the model can be changed while iterating over them
+    for agent in model.agents_by_id.values():
+        model.remove_agent(agent)
+    for location in model.locations_by_id.values():
+        model.remove_location(location)
+
+    assert model.agents_by_id == {}
+    assert model.locations_by_id == {}
@@ -0,0 +1,81 @@
+import pytest
+
+import pop2net as p2n
+
+
+class Classroom(p2n.MagicLocation):
+    def weight(self, agent):
+        return agent.hours
+
+
+class Office(p2n.MagicLocation):
+    weight_attrs = ("hours",)
+
+    def weight_batch(self, attributes):
+        return attributes["hours"] * 2
+
+
+class Home(p2n.MagicLocation):
+    static_weight = True
+
+    def weight(self, agent):
+        return agent.hours
+
+
+def test_sim_step_refreshes_dynamic_weights(model_cls):
+    class Model(model_cls):
+        def step(self):
+            for agent in self.agents:
+                agent.hours += 1
+
+    model = Model()
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    for i, agent in enumerate(agents):
+        agent.hours = i
+    locations = [Classroom(model), Office(model), Home(model), p2n.Location(model)]
+    for location in locations:
+        location.add_agents(agents)
+
+    model.run(steps=2, display=False)
+
+    # the weights are refreshed at the beginning of each step, before the agents act
+    assert list(model._weight_registry.values()) == locations[:2]
+    assert [locations[0].get_weight(agent) for agent in agents] == [1, 2, 3]
+    assert [locations[1].get_weight(agent) for agent in agents] == [2, 4, 6]
+    assert [locations[2].get_weight(agent) for agent in agents] == [1, 1, 1]
+    assert [locations[3].get_weight(agent) for agent in agents] == [1, 1, 1]
+
+
+def test_update_weight_registry():
+    model = p2n.Model()
+    classroom = Classroom(model)
+    home = Home(model)
+
+    model.update_weight_registry()
+    assert list(model._weight_registry.values()) == [classroom]
+
+    home.static_weight = False
+    model.update_weight_registry([home])
+    assert list(model._weight_registry.values()) == [classroom, home]
+
+    model.remove_location(classroom)
+    assert list(model._weight_registry.values()) == [home]
+
+
+def test_removed_locations_are_not_pending():
+    model = p2n.Model()
+    locations = [Classroom(model), Office(model), Home(model), Classroom(model)]
+
+    model.remove_location(locations[0])
+    model.remove_locations(locations[1:3])
+    assert list(model._unchecked_locations.values()) == [locations[3]]
+
+
+def test_set_location_weights():
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    location = p2n.Location(model)
+    location.add_agents(agents)
+
+    model.set_location_weights(location, [2, None, 0.5])
+    assert [location.get_weight(agent) for agent in location.agents] == [2, 1, 0.5]
@@ -0,0 +1,106 @@
+import itertools
+import random
+
+import networkx as nx
+import pytest
+
+import pop2net as p2n
+
+
+class Home(p2n.Location):
+    pass
+
+
+class Work(p2n.Location):
+    def project_weights(self, agent1, agent2):
+        return (self.get_weight(agent1) + self.get_weight(agent2)) / 2
+
+
+def _create_model(model_cls, weights, location_classes=(Home,)):
+    rng = random.Random(1)
+    model = model_cls()
+    agents = p2n.AgentList(model, 30, p2n.Agent)
+    for location_cls in location_classes:
+        for _ in range(6):
+            location = location_cls(model)
+            for agent in rng.sample(list(agents), 6):
+                location.add_agent(agent)
+                location.set_weight(agent, rng.choice(weights))
+    return model
+
+
+def _expected_weights(model):
+    return {
+        frozenset((u.id, v.id)): u.get_agent_weight(v)
+        for u, v in itertools.combinations(model.agents, 2)
+        if v in u.neighbors()
+    }
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [[1], [0, 1, 2.5], [0.5, 1, 3, 4], [i / 10 for i in range(50)]],
+)
+@pytest.mark.parametrize("location_classes", [(Home,), (Home, Work)])
+def test_export_agent_network_matches_pairwise_weights(model_cls, weights, location_classes):
+    model = _create_model(model_cls, weights, location_classes)
+    expected = _expected_weights(model)
+
+    graph = model.export_agent_network()
+    assert set(graph.nodes) == {agent.id for agent in model.agents}
+    assert {frozenset(edge) for edge in graph.edges} == set(expected)
+    for (u, v), weight in nx.get_edge_attributes(graph, "weight").items():
+        assert weight == pytest.approx(expected[frozenset((u, v))])
+
+    graph = model.export_agent_network(include_0_weights=False)
+    assert {frozenset(edge) for edge in graph.edges} == {
+        pair for pair, weight in expected.items() if weight > 0
+    }
+
+
+def test_export_agent_network_integer_weights(model_cls):
+    model = _create_model(model_cls, [0, 1, 2, 5])
+    expected = _expected_weights(model)
+
+    # integer weights are combined exactly and exported as integers, like pair by pair
+    weights = nx.get_edge_attributes(model.export_agent_network(), "weight")
+    assert {frozenset(pair): weight for pair, weight in weights.items()} == expected
+    assert all(type(weight) is int for weight in weights.values())
+
+
+@pytest.mark.parametrize(
+    ("projection", "function"),
+    [("min", min), ("product", lambda a, b: a * b), ("sum", lambda a, b: a + b)],
+)
+def test_export_agent_network_projection(model_cls, projection, function):
+    model = _create_model(model_cls, [0, 1, 2.5], (Home, Work))
+
+    matrix = model.export_agent_network(projection=projection, return_sparse=True)
+    agents = list(model.agents)
+    assert matrix.shape == (len(agents), len(agents))
+
+    for i, j in itertools.combinations(range(len(agents)), 2):
+        u, v = agents[i], agents[j]
+        expected = sum(
+            function(location.get_weight(u), location.get_weight(v))
+            for location in u.shared_locations(v)
+        )
+        assert matrix[i, j] == pytest.approx(expected)
+        assert matrix[j, i] == pytest.approx(expected)
+
+
+def test_export_agent_network_node_attrs():
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    for i, agent in enumerate(agents):
+        agent.age = i
+    p2n.Location(model).add_agents(agents[:2])
+
+    graph = model.export_agent_network(node_attrs=["age"])
+    assert dict(graph.nodes(data="age")) == {agent.id: agent.age for agent in agents}
+    assert list(graph.edges(data="weight")) == [(agents[0].id, agents[1].id, 1)]
+
+
+def test_export_agent_network_unknown_projection():
+    with pytest.raises(Exception, match="projection"):
+        p2n.Model().export_agent_network(projection="max")
@@ -0,0 +1,88 @@
+import pytest
+
+import pop2net as p2n
+
+
+class Home(p2n.Location):
+    pass
+
+
+class School(p2n.Location):
+    pass
+
+
+@pytest.fixture
+def model(model_cls):
+    class CachedModel(model_cls):
+        cache_neighbors = True
+
+    return CachedModel()
+
+
+def test_neighbor_cache_hits(model):
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    Home(model).add_agents(agents)
+
+    assert list(agents[0].neighbors()) == list(agents[1:])
+    assert list(agents[0].neighbors()) == list(agents[1:])
+    assert list(agents[0].neighbors([Home])) == list(agents[1:])
+    assert list(agents[0].neighbors(["Home"])) == list(agents[1:])
+    assert model.neighbor_cache_info() == {"hits": 2, "misses": 2, "entries": 2}
+
+    # changing the returned list does not change the cache
+    agents[0].neighbors().remove(agents[1])
+    assert list(agents[0].neighbors()) == list(agents[1:])
+
+    model.clear_neighbor_cache()
+    assert model.neighbor_cache_info() == {"hits": 0, "misses": 0, "entries": 0}
+
+
+def test_neighbor_cache_invalidation(model):
+    agents = p2n.AgentList(model, 4, p2n.Agent)
+    home = Home(model)
+    school = School(model)
+    home.add_agents(agents[:2])
+    school.add_agents(agents[2:])
+
+    for agent in agents:
+        agent.neighbors()
+        agent.neighbors([Home])
+        agent.neighbors([School])
+
+    # only the entries of the school's members that depend on schools are dropped
+    school.add_agent(agents[0])
+    assert model.neighbor_cache_info()["entries"] == 12 - 2 - 2 - 2
+    assert set(agents[0].neighbors()) == set(agents[1:])
+    assert list(agents[0].neighbors([Home])) == [agents[1]]
+    assert set(agents[2].neighbors([School])) == {agents[0], agents[3]}
+    assert list(agents[1].neighbors()) == [agents[0]]
+
+    school.remove_agent(agents[0])
+    assert list(agents[0].neighbors()) == [agents[1]]
+    assert list(agents[3].neighbors()) == [agents[2]]
+
+    model.remove_agent(agents[1])
+    assert list(agents[0].neighbors()) == []
+
+    model.remove_location(school)
+    assert list(agents[2].neighbors()) == []
+    assert list(agents[3].neighbors([School])) == []
+
+    home.add_agents(agents[2:])
+    assert set(agents[0].neighbors()) == set(agents[2:])
+
+    model.remove_memberships([home.id], [agents[3].id])
+    assert list(agents[2].neighbors()) == [agents[0]]
+
+    model.remove_locations([home])
+    assert list(agents[0].neighbors()) == []
+
+
+def test_neighbor_cache_is_opt_in():
+    model = p2n.Model()
+    agents = p2n.AgentList(model, 2, p2n.Agent)
+    Home(model).add_agents(agents)
+
+    agents[0].neighbors()
+    agents[0].neighbors()
+    assert model.neighbor_cache_info() == {"hits": 0, "misses": 0, "entries": 0}
@@ -0,0 +1,251 @@
+import pytest
+
+import pop2net as p2n
+
+
+def test_storage_class(array_model):
+    assert isinstance(p2n.Model()._storage, p2n.NetworkxStorage)
+    assert isinstance(array_model._storage, p2n.ArrayStorage)
+
+
+def test_agents_and_locations(model):
+    agents = p2n.AgentList(model, 5, p2n.Agent)
+    locations = p2n.LocationList(model, 2, p2n.Location)
+
+    assert list(model.agents) == list(agents)
+    assert list(model.locations) == list(locations)
+
+    locations[0].add_agents(agents[:3])
+    locations[1].add_agents(agents[2:])
+
+    assert list(locations[0].agents) == list(agents[:3])
+    assert list(locations[1].agents) == list(agents[2:])
+    assert list(agents[2].locations) == list(locations)
+    assert set(agents[2].neighbors()) == set(agents) - {agents[2]}
+    assert set(agents[0].neighbors()) == {agents[1], agents[2]}
+
+    model.remove_agent(agents[2])
+    assert agents[2] not in model.agents
+    assert list(locations[0].agents) == list(agents[:2])
+    assert list(agents[0].neighbors()) == [agents[1]]
+
+    model.remove_location(locations[0])
+    assert list(model.locations) == [locations[1]]
+    assert list(agents[0].locations) == []
+
+
+def test_weights_and_edge_attributes(model):
+    agent = p2n.Agent(model)
+    location = p2n.Location(model)
+
+    model.add_agent_to_location(location, agent, weight=None, role="teacher")
+    assert agent.get_location_weight(location) == 1
+    assert model.g[agent.id][location.id]["role"] == "teacher"
+
+    location.set_weight(agent, 2.5)
+    assert location.get_weight(agent) == 2.5
+
+    location.remove_agent(agent)
+    assert list(location.agents) == []
+    with pytest.raises(KeyError):
+        model.get_weight(agent, location)
+
+
+def test_g(model):
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    location = p2n.Location(model)
+    location.add_agents(agents)
+
+    graph = model.g
+    assert graph.number_of_nodes() == 4
+    assert graph.number_of_edges() == 3
+    assert graph.nodes[location.id]["bipartite"] == 1
+    assert graph.nodes[location.id]["_obj"] is location
+    assert all(graph.nodes[agent.id]["bipartite"] == 0 for agent in agents)
+
+
+def test_array_storage_rebuild(monkeypatch, array_model):
+    monkeypatch.setattr(p2n.ArrayStorage, "_MIN_REBUILD", 4)
+
+    model = array_model
+    agents = p2n.AgentList(model, 300, p2n.Agent)
+    locations = p2n.LocationList(model, 30, p2n.Location)
+
+    # enough memberships to trigger several rebuilds of the CSR offsets
+    for i, agent in enumerate(agents):
+        for j in range(5):
+            locations[(i + j) % 30].add_agent(agent)
+            locations[(i + j) % 30].set_weight(agent, i + j)
+
+    for i, agent in enumerate(agents):
+        assert {location.id for location in agent.locations} == {
+            locations[(i + j) % 30].id for j in range(5)
+        }
+        assert agent.get_location_weight(locations[(i + 4) % 30]) == i + 4
+
+    # enough removals to trigger a compaction
+    for i, agent in enumerate(agents[:250]):
+        for j in range(4):
+            locations[(i + j) % 30].remove_agent(agent)
+
+    assert model._storage._n_dead < 250 * 4
+
+    for i, agent in enumerate(agents):
+        assert len(agent.locations) == (1 if i < 250 else 5)
+        assert agent.get_location_weight(locations[(i + 4) % 30]) == i + 4
+
+    assert sum(len(location.agents) for location in locations) == 250 + 50 * 5
+
+
+def test_views_follow_additions_and_removals(model):
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    location = p2n.Location(model)
+
+    view = model.agents
+    view.remove(agents[0])
+    view.append(location)
+    assert list(model.agents) == list(agents)
+
+    model.remove_agent(agents[0])
+    model.add_agent(agents[0])
+    assert list(model.agents) == [agents[1], agents[2], agents[0]]
+
+    model.remove_location(location)
+    assert list(model.locations) == []
+    model.add_location(location)
+    assert list(model.locations) == [location]
+
+
+def test_objects_between_objects(model):
+    class Home(p2n.Location):
+        pass
+
+    class School(p2n.Location):
+        pass
+
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    home = Home(model)
+    school = School(model)
+    other_home = Home(model)
+
+    home.add_agents(agents[:2])
+    school.add_agents(agents)
+    other_home.add_agent(agents[2])
+
+    assert list(model.locations_between_agents(agents[0], agents[1])) == [home, school]
+    assert list(model.locations_between_agents(agents[0], agents[2])) == [school]
+    assert list(model.locations_between_agents(agents[0], agents[1], [School])) == [school]
+    assert list(model.locations_between_agents(agents[0], agents[1], ["Home"])) == [home]
+
+    assert list(model.agents_between_locations(home, school)) == list(agents[:2])
+    assert list(model.agents_between_locations(home, other_home)) == []
+    assert list(model.agents_between_locations(school, other_home, [p2n.Agent])) == [agents[2]]
+
+    with pytest.raises(Exception):  # noqa: B017, PT011
+        model.locations_between_agents(agents[0], agents[1], [])
+
+
+@pytest.mark.parametrize("min_rebuild", [1024, 4])
+def test_add_memberships(model, monkeypatch, min_rebuild):
+    # a small threshold sends the array storage down its vectorized path
+    monkeypatch.setattr(p2n.ArrayStorage, "_MIN_REBUILD", min_rebuild)
+
+    agents = p2n.AgentList(model, 10, p2n.Agent)
+    locations = p2n.LocationList(model, 2, p2n.Location)
+    locations[0].add_agent(agents[0])
+    locations[0].set_weight(agents[0], 5)
+
+    model.add_memberships(
+        location_ids=[locations[0].id] * 5 + [locations[1].id] * 5 + [locations[0].id],
+        agent_ids=[agent.id for agent in agents] + [agents[1].id],
+        weights=[None, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10],
+        role="member",
+    )
+
+    assert list(locations[0].agents) == list(agents[:5])
+    assert list(locations[1].agents) == list(agents[5:])
+    assert locations[0].get_weight(agents[0]) == 1
+    assert locations[0].get_weight(agents[1]) == 10
+    assert locations[1].get_weight(agents[9]) == 9
+    assert model.g[agents[3].id][locations[0].id]["role"] == "member"
+
+    model.add_memberships([locations[1].id] * 2, [agents[0].id, agents[1].id], weights=2)
+    assert list(agents[0].locations) == list(locations)
+    assert locations[1].get_weight(agents[1]) == 2
+
+
+def test_add_memberships_errors(model):
+    agent = p2n.Agent(model)
+    location = p2n.Location(model)
+
+    with pytest.raises(Exception, match="same length"):
+        model.add_memberships([location.id], [agent.id, agent.id])
+    with pytest.raises(Exception, match="Location"):
+        model.add_memberships([location.id + 100], [agent.id])
+    with pytest.raises(Exception, match="Agent"):
+        model.add_memberships([location.id], [agent.id + 100])
+    assert list(location.agents) == []
+
+
+def test_add_agents_and_locations(model):
+    agents = p2n.AgentList(model, 3, p2n.Agent)
+    locations = p2n.LocationList(model, 3, p2n.Location)
+
+    locations[0].add_agents(agents)
+    agents[0].add_locations(locations[1:])
+
+    assert list(locations[0].agents) == list(agents)
+    assert list(agents[0].locations) == list(locations)
+    assert all(agents[0].get_location_weight(location) == 1 for location in locations)
+
+
+@pytest.mark.parametrize("min_rebuild", [1024, 4])
+def test_bulk_removal(model, monkeypatch, min_rebuild):
+    # a small threshold sends the array storage down its vectorized path
+    monkeypatch.setattr(p2n.ArrayStorage, "_MIN_REBUILD", min_rebuild)
+
+    agents = p2n.AgentList(model, 10, p2n.Agent)
+    locations = p2n.LocationList(model, 4, p2n.Location)
+    for location in locations:
+        location.add_agents(agents)
+
+    locations[0].remove_agents(agents[:6])
+    assert list(locations[0].agents) == list(agents[6:])
+
+    agents[9].remove_locations(locations[1:3])
+    assert list(agents[9].locations) == [locations[0], locations[3]]
+
+    model.remove_memberships(
+        location_ids=[locations[3].id] * 3,
+        agent_ids=[agents[0].id, agents[0].id, agents[1].id],
+    )
+    assert list(locations[3].agents) == list(agents[2:])
+
+    model.remove_agents(agents[:8])
+    assert list(model.agents) == list(agents[8:])
+    assert list(locations[0].agents) == list(agents[8:])
+    assert list(locations[2].agents) == [agents[8]]
+
+    model.remove_locations(locations[:2])
+    assert list(model.locations) == list(locations[2:])
+    assert list(agents[9].locations) == [locations[3]]
+
+    # removing again is a no-op
+    model.remove_agents(agents[:8])
+    model.remove_locations(locations[:2])
+    assert len(model.agents) == 2
+    assert len(model.locations) == 2
+
+
+def test_remove_memberships_errors(model):
+    agent = p2n.Agent(model)
+    location = p2n.Location(model)
+    location.add_agent(agent)
+
+    with pytest.raises(Exception, match="same length"):
+        model.remove_memberships([location.id], [agent.id, agent.id])
+    with pytest.raises(Exception, match="Location"):
+        model.remove_memberships([location.id + 100], [agent.id])
+    with pytest.raises(Exception, match="Agent"):
+        model.remove_memberships([location.id], [agent.id + 100])
+    assert list(location.agents) == [agent]
@@ -0,0 +1,70 @@
+import pytest
+
+import pop2net as p2n
+
+
+class Home(p2n.Location):
+    pass
+
+
+class School(p2n.Location):
+    pass
+
+
+class PrivateSchool(School):
+    pass
+
+
+class Pupil(p2n.Agent):
+    pass
+
+
+def test_objects_of_type(model):
+    agents = p2n.AgentList(model, 2, p2n.Agent)
+    pupils = p2n.AgentList(model, 2, Pupil)
+    home = Home(model)
+    school = School(model)
+    private_school = PrivateSchool(model)
+
+    assert list(model.agents_of_type(Pupil)) == list(pupils)
+    assert list(model.agents_of_type([p2n.Agent, "Pupil"])) == list(agents) + list(pupils)
+    assert list(model.locations_of_type(School)) == [school]
+    assert list(model.locations_of_type("Home")) == [home]
+    assert list(model.locations_of_type(School, include_subclasses=True)) == [
+        school,
+        private_school,
+    ]
+
+    model.remove_agents(pupils[:1])
+    model.remove_location(school)
+    assert list(model.agents_of_type(Pupil)) == list(pupils[1:])
+    assert list(model.locations_of_type(School)) == []
+
+    with pytest.raises(Exception, match="must not be empty"):
+        model.locations_of_type([])
+
+
+def test_locations_of_type(model):
+    agent, other = p2n.AgentList(model, 2, p2n.Agent)
+    homes = p2n.LocationList(model, 2, Home)
+    schools = p2n.LocationList(model, 2, School)
+
+    agent.add_locations(homes)
+    schools[0].add_agents([agent, other])
+    model.add_memberships([schools[1].id], [agent.id])
+
+    assert list(agent.locations_of_type(Home)) == list(homes)
+    assert list(agent.locations_of_type("School")) == list(schools)
+    assert list(agent.locations_of_type([Home, School])) == list(homes) + list(schools)
+    assert list(other.locations_of_type(Home)) == []
+    assert list(agent.neighbors(location_classes=[School])) == [other]
+    assert list(agent.neighbors(location_classes=[Home])) == []
+
+    schools[0].remove_agent(other)
+    agent.remove_locations(homes[:1])
+    assert list(agent.neighbors(location_classes=[School])) == []
+    assert list(agent.locations_of_type(Home)) == list(homes[1:])
+
+    model.remove_locations(schools)
+    assert list(agent.locations_of_type(School)) == []
+    assert list(agent.locations) == list(homes[1:])
@@ -1,3 +1,7 @@
+import os
+import subprocess
+import sys
+
 import numpy as np
 
 import pop2net as p2n
@@ -138,3 +142,32 @@ def test_join_positions():
     assert utils._join_positions(pos1="b", pos2="a") == "a-b"
     assert utils._join_positions(pos1=0, pos2=1) == "0-1"
     assert utils._join_positions(pos1=1, pos2=0) == "0-1"
+
+
+def test_set_order():
+    values = [8, 2, 40, 4, 6, 2, -1, 2.5, (1, 2)]
+    assert utils._set_order(values) == list(set(values))
+
+    # strings get the same order in every Python process
+    script = "import pop2net.utils as u; print(u._set_order(['a', 'b', 'c', 'd', 'e', 'f']))"
+    outputs = {
+        subprocess.run(
+            [sys.executable, "-c", script],
+            env={**os.environ, "PYTHONHASHSEED": seed},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        for seed in ["1", "2", "3"]
+    }
+    assert len(outputs) == 1
+
+
+def test_group_offsets():
+    order, starts, lengths = utils._group_offsets(["a", "b", "a", "c", None, "b"])
+    assert list(order) == [0, 2, 1, 5, 3, 4]
+    assert list(starts) == [0, 2, 4, 5]
+    assert list(lengths) == [2, 2, 1, 1]
+
+    positions = utils._gather_groups(order, starts, lengths, np.array([1, 0, 1, 3]))
+    assert list(positions) == [1, 5, 0, 2, 1, 5, 4]